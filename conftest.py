@@ -7,6 +7,9 @@ from product_mdp.product_mdp import ProductMDP
 from dfa.examples import *
 from utils import read_policy
 
+MDP_POLICY = "/home/lening/Desktop/qualitative_choice_logic/mdp_example/policy.tsv"
+PRODUCT_MDP_POLICY = "/home/lening/Desktop/qualitative_choice_logic/toy_example/policy.tsv"
+
 
 @pytest.fixture
 def construct_eventually_a_dfa():
@@ -37,16 +40,12 @@ def construct_a_inaccessiable_mdp():
 
 @pytest.fixture
 def mdp_policy():
-    return read_policy(
-        "/home/lening/Desktop/qualitative_choice_logic/mdp_example/policy.tsv"
-    )
+    return read_policy(MDP_POLICY)
 
 
 @pytest.fixture
 def product_mdp_policy():
-    return read_policy(
-        "/home/lening/Desktop/qualitative_choice_logic/toy_example/policy.tsv"
-    )
+    return read_policy(PRODUCT_MDP_POLICY)
 
 
 @pytest.fixture
@@ -2,7 +2,7 @@ from wdfa.helpers import get_wdfa_from_dfa, ordered_or, check_dir
 from product_mdp.product_mdp import ProductMDP
 from mdp.mdp import MDP
 from dfa.examples import DFA_2, DFA_8, DFA_12
-from solver.lp_evaluator import LPEvaluator
+from solver.policy_evaluator import PolicyEvaluator
 from utils import plot_value_surf, plot_heatmap
 import os
 from utils import read_policy, projected_policy
@@ -25,13 +25,13 @@ product_mdp12 = ProductMDP(mdp, wdfa12)
 
 policy = read_policy(os.path.join("example_2", "policy.tsv"))
 
-evaluator2 = LPEvaluator(product_mdp2, policy_path=os.path.join("example_2", "policy.tsv"), disp=False)
+evaluator2 = PolicyEvaluator(product_mdp2, policy_path=os.path.join("example_2", "policy.tsv"), disp=False)
 evaluator2.set_policy(projected_policy(policy, col=0))
 
-evaluator8 = LPEvaluator(product_mdp8, policy_path=os.path.join("example_2", "policy.tsv"), disp=False)
+evaluator8 = PolicyEvaluator(product_mdp8, policy_path=os.path.join("example_2", "policy.tsv"), disp=False)
 evaluator8.set_policy(projected_policy(policy, col=1))
 
-evaluator12 = LPEvaluator(product_mdp12, policy_path=os.path.join("example_2", "policy.tsv"), disp=False)
+evaluator12 = PolicyEvaluator(product_mdp12, policy_path=os.path.join("example_2", "policy.tsv"), disp=False)
 
 evaluator2.evaluate()
 value2 = {s[0]: evaluator2.value[s] for s in product_mdp2.states if s[-1] == "0"}
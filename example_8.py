@@ -3,7 +3,7 @@ from product_mdp.product_mdp import ProductMDP
 from mdp.mdp import MDP
 from dfa.examples import DFA_2, DFA_8, DFA_12
 from solver.lp_solver import LPSolver
-from solver.lp_evaluator import LPEvaluator
+from solver.policy_evaluator import PolicyEvaluator
 from utils import plot_value_surf, plot_heatmap
 import os
 from utils import read_policy, projected_policy
@@ -31,12 +31,12 @@ solver.solve()
 
 policy = read_policy(os.path.join("example_8", "policy.tsv"))
 
-evaluator = LPEvaluator(product_mdp, policy_path=os.path.join("example_8", "policy.tsv"), disp=False)
+evaluator = PolicyEvaluator(product_mdp, policy_path=os.path.join("example_8", "policy.tsv"), disp=False)
 
-evaluator2 = LPEvaluator(product_mdp2, policy_path=os.path.join("example_8", "policy.tsv"), disp=False)
+evaluator2 = PolicyEvaluator(product_mdp2, policy_path=os.path.join("example_8", "policy.tsv"), disp=False)
 evaluator2.set_policy(projected_policy(policy, col=0))
 
-evaluator8 = LPEvaluator(product_mdp8, policy_path=os.path.join("example_8", "policy.tsv"), disp=False)
+evaluator8 = PolicyEvaluator(product_mdp8, policy_path=os.path.join("example_8", "policy.tsv"), disp=False)
 evaluator8.set_policy(projected_policy(policy, col=1))
 
 evaluator.evaluate()
@@ -0,0 +1,151 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from mdp.state_space import StateSpace
+
+# the probabilities are compared after rounding to this number of decimals
+DECIMALS = 9
+
+
+def block_matrix(block: np.ndarray, num_blocks: int) -> csr_matrix:
+    """
+    Return the |S| x |B| indicator matrix of a partition
+
+    :param block: the block id of every state id
+    :param num_blocks: the number of blocks
+    :return: the matrix whose entry (s, b) is 1 if the state s is in the block b
+    """
+    return csr_matrix(
+        (np.ones(len(block)), (np.arange(len(block)), block)),
+        shape=(len(block), num_blocks),
+    )
+
+
+def bisimulation_partition(
+    transition_matrix: csr_matrix, reward_matrix: np.ndarray, seed: int = 0
+) -> np.ndarray:
+    """
+    Compute the coarsest probabilistic bisimulation by partition refinement: two states are in the same block if
+    every action has the same reward and the same probability of moving to every block. The states are first
+    split by their rewards; every round then splits the blocks by the distributions over the blocks of the
+    previous round, which are compared by a random linear hash of the rounded probabilities.
+
+    :param transition_matrix: the (|S| * |A|) x |S| transition matrix
+    :param reward_matrix: the |S| x |A| matrix of rewards
+    :param seed: the seed of the hash, defaults to 0
+    :return: the block id of every state id, numbered in the order of the first state of every block
+    """
+    num_states, num_actions = reward_matrix.shape
+    _, block = np.unique(reward_matrix, axis=0, return_inverse=True)
+    block = block.ravel()
+    num_blocks = block.max(initial=-1) + 1
+    rng = np.random.default_rng(seed)
+
+    while True:
+        # the probability of moving to every block, for every state-action row; the product has no duplicate
+        # entries, and the hash does not depend on their order
+        distribution = (transition_matrix @ block_matrix(block, num_blocks)).tocsr()
+        keys = rng.integers(1, 2 ** 63, size=num_blocks + num_actions + 1, dtype=np.uint64)
+        weights = np.round(distribution.data * 10 ** DECIMALS).astype(np.uint64)
+        # the overflows wrap around, which keeps the hashes linear modulo 2^64
+        with np.errstate(over="ignore"):
+            nonempty = np.diff(distribution.indptr) > 0
+            hashes = np.zeros(distribution.shape[0], dtype=np.uint64)
+            hashes[nonempty] = np.add.reduceat(
+                weights * keys[distribution.indices], distribution.indptr[:-1][nonempty]
+            )
+            signature = block.astype(np.uint64) * keys[num_blocks] + (
+                hashes.reshape(num_states, num_actions) * keys[num_blocks + 1 :]
+            ).sum(axis=1, dtype=np.uint64)
+        _, new_block = np.unique(signature, return_inverse=True)
+        new_num_blocks = new_block.max(initial=-1) + 1
+        if new_num_blocks == num_blocks:
+            break
+        block, num_blocks = new_block.ravel(), new_num_blocks
+
+    # number the blocks by their first states
+    _, first, inverse = np.unique(block, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first))
+    return order[inverse.ravel()]
+
+
+class Bisimulation(object):
+    """
+    The quotient of an mdp by its coarsest probabilistic bisimulation. A block of bisimilar states is represented by
+    its first state, and the quotient is an MDP over the representatives. The values and policies of the quotient
+    are lifted back to all the states since bisimilar states have the same Q-values.
+    """
+
+    def __init__(self, mdp) -> None:
+        """
+        Initialization
+
+        :param mdp: the mdp or product mdp with rewards
+        """
+        # avoid the circular import of MDP
+        from mdp.mdp import MDP
+
+        self.mdp = mdp
+        num_states, num_actions = len(mdp.states), len(mdp.actions)
+        reward_matrix = mdp.reward_vector().reshape(num_states, num_actions)
+
+        self.block = bisimulation_partition(mdp.transition_matrix, reward_matrix)
+        self.num_blocks = self.block.max(initial=-1) + 1
+        _, self.representatives = np.unique(self.block, return_index=True)
+
+        rows = (
+            self.representatives[:, None] * num_actions + np.arange(num_actions)
+        ).ravel()
+        transitions = (
+            mdp.transition_matrix[rows] @ block_matrix(self.block, self.num_blocks)
+        ).tocsr()
+        states = StateSpace(mdp.states[i] for i in self.representatives.tolist())
+        reward = {
+            (states[b], mdp.actions[a]): r
+            for (b, a), r in np.ndenumerate(reward_matrix[self.representatives])
+            if r
+        }
+
+        self.quotient = MDP(
+            init=states[self.block[mdp.states.index(mdp.init)]],
+            actions=mdp.actions,
+            states=states,
+            gamma=mdp.gamma,
+            reward=reward,
+            transitions=transitions,
+            AP=getattr(mdp, "AP", []),
+            L=getattr(mdp, "L", {}),
+        )
+
+    def block_of(self, s) -> int:
+        """
+        Return the block id of a state
+
+        :param s: the state
+        :return: the block id
+        """
+        return int(self.block[self.mdp.states.index(s)])
+
+    def lift(self, vector: np.ndarray) -> np.ndarray:
+        """
+        Lift a vector over the blocks, e.g., the value or the policy of the quotient, to all the states
+
+        :param vector: the vector indexed by the block ids
+        :return: the vector indexed by the state ids
+        """
+        return np.asarray(vector)[self.block]
+
+    def lift_policy_and_value(self, policy_vector: np.ndarray, value_vector: np.ndarray) -> tuple:
+        """
+        Lift the policy and value of the quotient to dictionaries over all the states
+
+        :param policy_vector: the action id of every block id
+        :param value_vector: the value of every block id
+        :return: the policy and the value
+        """
+        policy = {
+            s: self.mdp.actions[k]
+            for s, k in zip(self.mdp.states, self.lift(policy_vector).tolist())
+        }
+        value = dict(zip(self.mdp.states, self.lift(value_vector).tolist()))
+        return policy, value
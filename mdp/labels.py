@@ -0,0 +1,202 @@
+import numpy as np
+
+# the symbol of the empty set of atomic propositions
+EMPTY = "E"
+
+
+def label_atoms(label) -> frozenset:
+    """
+    Return the set of atomic propositions of a label: "E" is the empty set, a string is a single proposition or a
+    conjunction "a&b", and a collection is a set of propositions
+
+    :param label: the label
+    :return: the set of propositions
+    """
+    if isinstance(label, str):
+        atoms = label.split("&")
+    else:
+        atoms = label
+    return frozenset(a.strip() for a in atoms) - {EMPTY}
+
+
+def proposition_bits(AP: list, labels=()) -> dict:
+    """
+    Return the bit of every atomic proposition: the propositions of AP in their order, then the other propositions
+    of the labels in sorted order
+
+    :param AP: the atomic propositions
+    :param labels: the labels, defaults to ()
+    :return: the dictionary from the propositions to their bits
+    """
+    atoms = [a for a in AP if a != EMPTY]
+    extra = set().union(*(label_atoms(label) for label in labels)) - set(atoms)
+    return {a: i for i, a in enumerate(atoms + sorted(extra))}
+
+
+def label_mask(label, bits: dict) -> int:
+    """
+    Return the bitmask of a label, or -1 if it has a proposition without a bit
+
+    :param label: the label
+    :param bits: the bit of every proposition
+    :return: the bitmask
+    """
+    mask = 0
+    for a in label_atoms(label):
+        if a not in bits:
+            return -1
+        mask |= 1 << bits[a]
+    return mask
+
+
+def guard_masks(guard: str, bits: dict) -> tuple:
+    """
+    Return the masks of a guard: a conjunction of literals "a&!b", or "true". A label satisfies the guard if it has
+    all the positive propositions and none of the negated ones.
+
+    :param guard: the guard
+    :param bits: the bit of every proposition
+    :return: the mask of the positive propositions and the mask of the negated propositions
+    """
+    positive, negative = 0, 0
+    if guard.strip() == "true":
+        return positive, negative
+    for literal in guard.split("&"):
+        literal = literal.strip()
+        if literal.startswith("!"):
+            negative |= 1 << bits[literal[1:].strip()]
+        else:
+            positive |= 1 << bits[literal]
+    return positive, negative
+
+
+def encode_labels(labels, bits: dict) -> np.ndarray:
+    """
+    Return the bitmasks of the labels, computing the mask of every distinct label once
+
+    :param labels: an iterable of labels
+    :param bits: the bit of every proposition
+    :return: the array of bitmasks
+    """
+    cache = {}
+    masks = []
+    for label in labels:
+        if label not in cache:
+            cache[label] = label_mask(label, bits)
+        masks.append(cache[label])
+    return np.asarray(masks, dtype=np.int64)
+
+
+class Labeling(dict):
+    """
+    The labeling function of an mdp: a dictionary from the states to their labels which also keeps
+     1. the list of the distinct labels, indexed by integer label ids,
+     2. the label id of every state id, as an array (-1 for the unlabeled states),
+     3. the sorted ids of the states of every label, computed from 2 on the first query and cached.
+    Every assignment L[s] = label updates the first two in O(1) and only drops the cached ids of the old and the new
+    label of s.
+    A label which is not a string is stored as a frozenset of propositions.
+    """
+
+    def __init__(self, states, labels: dict = None, default=None) -> None:
+        """
+        Initialization
+
+        :param states: the state space
+        :param labels: the labels of some states, defaults to None
+        :param default: the label of the other states, defaults to None for unlabeled states
+        """
+        super(Labeling, self).__init__()
+        self.states = states
+        self.default = default
+        self.labels = []
+        self._label_ids = {}
+        self._state_ids = {}
+        self.ids = np.full(len(states), -1, dtype=np.int32)
+        if default is not None:
+            super(Labeling, self).update(dict.fromkeys(states, default))
+            self.ids[:] = self.label_id(default)
+        if labels is not None:
+            self.update(labels)
+
+    def label_id(self, label) -> int:
+        """
+        Return the id of a label, adding it to the labels if it is new
+
+        :param label: the label
+        :return: the id
+        """
+        label = label if isinstance(label, str) else frozenset(label)
+        if label not in self._label_ids:
+            self._label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        return self._label_ids[label]
+
+    def state_ids(self, label) -> np.ndarray:
+        """
+        Return the sorted ids of the states with a label
+
+        :param label: the label
+        :return: the read-only array of state ids
+        """
+        label = label if isinstance(label, str) else frozenset(label)
+        if label not in self._label_ids:
+            return np.zeros(0, dtype=np.int64)
+        j = self._label_ids[label]
+        if j not in self._state_ids:
+            ids = np.flatnonzero(self.ids == j).astype(np.int64)
+            ids.flags.writeable = False
+            self._state_ids[j] = ids
+        return self._state_ids[j]
+
+    def states_with(self, label) -> list:
+        """
+        Return the states with a label
+
+        :param label: the label
+        :return: the list of states
+        """
+        return [self.states[i] for i in self.state_ids(label)]
+
+    def masks(self, bits: dict) -> np.ndarray:
+        """
+        Return the bitmask of the label of every state id, -1 for the unlabeled states
+
+        :param bits: the bit of every proposition
+        :return: the array of bitmasks
+        """
+        masks = np.append(encode_labels(self.labels, bits), -1)
+        return masks[self.ids]
+
+    def __setitem__(self, s, label) -> None:
+        i = self.states.index(s)
+        j = self.label_id(label)
+        self._state_ids.pop(int(self.ids[i]), None)
+        self._state_ids.pop(j, None)
+        self.ids[i] = j
+        super(Labeling, self).__setitem__(s, self.labels[j])
+
+    def __delitem__(self, s) -> None:
+        super(Labeling, self).__delitem__(s)
+        i = self.states.index(s)
+        self._state_ids.pop(int(self.ids[i]), None)
+        self.ids[i] = -1
+
+    def update(self, *args, **kwargs) -> None:
+        for s, label in dict(*args, **kwargs).items():
+            self[s] = label
+
+    def setdefault(self, s, label=None):
+        if s not in self:
+            self[s] = label
+        return self[s]
+
+    def pop(self, s, *default):
+        if s not in self:
+            return super(Labeling, self).pop(s, *default)
+        label = self[s]
+        del self[s]
+        return label
+
+    def __reduce__(self):
+        return Labeling, (self.states, dict(self), self.default)
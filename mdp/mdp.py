@@ -1,19 +1,41 @@
 import numpy as np
 import yaml
-from collections import defaultdict
-from itertools import product
+from scipy.sparse import csr_matrix
 from tabulate import tabulate
 
+from mdp.labels import Labeling, encode_labels, proposition_bits
+from mdp.qualitative import QualitativeSets
+from mdp.sampling import TransitionSampler
+from mdp.state_space import GridStateSpace, StateSpace
+from mdp.transitions import TransitionView, transition_matrix_from_dict
+
+# unit moves of the grid actions 0-3
+MOVES = np.asarray([[0, 1], [1, 0], [0, -1], [-1, 0]])
+
+# the intended move followed by the two slips of each grid action, in the order used by MDP.neighbors
+MOVES_WITH_SLIPS = np.asarray(
+    [
+        [[0, 1], [-1, 0], [1, 0]],
+        [[1, 0], [0, 1], [0, -1]],
+        [[0, -1], [-1, 0], [1, 0]],
+        [[-1, 0], [0, 1], [0, -1]],
+    ]
+)
+
 
 class MDP(object):
     """
     A Markov Decision Process defined by
+     0. a state space mapping the states to the integer ids used by the transition matrix,
      1. an initial state,
-     2. transition model --- the probability transition matrix implemented as a dictionary: prob[s][a][s'] is the probability of going from s to s' with action a,
+     2. transition model --- the probability transition matrix stored as a sparse (|S| * |A|) x |S| matrix: the row
+        s * |A| + a holds the distribution over next states of state s and action a. It is also available as a
+        dictionary-like view: prob[s][a][s'] is the probability of going from s to s' with action a,
      3. reward function.
      4. gamma value, for use by algorithms
      5. AP: a set of atomic propositions implemented as a list: Each proposition is identified by an index between 0-N.
-     6. L: the labeling function implemented as a dictionary: L[s]: a subset of AP.
+     6. L: the labeling function implemented as a dictionary: L[s]: a subset of AP, either a single proposition, "E" for
+        the empty set, or a frozenset of propositions, e.g., a YAML list for overlapping regions.
      7. obstacles: a list of terminal states
     We keep track of the possible actions for state s: prob[s].keys() and possible next states with action a: prob[s][a].keys()
     """
@@ -34,26 +56,114 @@ class MDP(object):
 
         else:
             for key in kwargs:
-                setattr(self, key, kwargs[key])
+                if key != "transitions":
+                    setattr(self, key, kwargs[key])
+            if hasattr(self, "states") and not isinstance(self.states, StateSpace):
+                self.states = StateSpace(self.states)
+            # the transitions are indexed by the states and actions, so they are set last
+            if "transitions" in kwargs:
+                self.transitions = kwargs["transitions"]
+
+    @property
+    def transition_matrix(self) -> csr_matrix:
+        """
+        The (|S| * |A|) x |S| transition matrix. Setting it resets the sampling tables.
+        """
+        return self._transition_matrix
 
-    def construct_states(self) -> list:
-        return list(
-            product(range(self.grid_world_size[0]), range(self.grid_world_size[1]))
-        )
+    @transition_matrix.setter
+    def transition_matrix(self, matrix: csr_matrix) -> None:
+        self._transition_matrix = matrix
+        self.reset_sampler()
+
+    def reset_sampler(self) -> None:
+        """
+        Reset the sampling tables, to be called after editing the transition matrix in place
+        """
+        self._sampler = None
+
+    def transition_sampler(self) -> TransitionSampler:
+        """
+        Return the sampling tables of the transitions, built on the first call after the transitions change
+        """
+        if getattr(self, "_sampler", None) is None:
+            self._sampler = TransitionSampler(self.transition_matrix)
+        return self._sampler
+
+    @property
+    def rng(self) -> np.random.Generator:
+        """
+        The random generator of the stochastic transitions, see seed
+        """
+        if getattr(self, "_rng", None) is None:
+            self._rng = np.random.default_rng()
+        return self._rng
+
+    def seed(self, seed=None) -> None:
+        """
+        Seed the random generator of the stochastic transitions
+
+        :param seed: the seed, an int, a SeedSequence or a Generator
+        """
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def transitions(self) -> TransitionView:
+        """
+        The dictionary-like view transitions[s][a][ns] of the transition matrix
+        """
+        return TransitionView(self)
+
+    @transitions.setter
+    def transitions(self, transitions) -> None:
+        """
+        Set the transitions given either a transition matrix or a nested dictionary transitions[s][a][ns]
+
+        :param transitions: the transition matrix or the nested dictionary
+        """
+        if isinstance(transitions, csr_matrix):
+            self.transition_matrix = transitions
+        else:
+            self.transition_matrix = transition_matrix_from_dict(
+                transitions, self.states, self.actions
+            )
+
+    def construct_states(self) -> GridStateSpace:
+        return GridStateSpace(self.grid_world_size)
 
     def fill_labeling_func(self):
         """
-        Fullfil the labeling function
+        Fullfil the labeling function, indexed by the states, see Labeling
         """
         self.AP.append("end")
-        labeled_states = self.L.keys()
-        for s in self.states:
-            if s in self.obstacles:
-                self.L[s] = "o"
-            elif s not in labeled_states:
-                self.L[s] = "E"
-            if s == "sT":
-                self.L[s] = "end"
+        self.L = Labeling(self.states, self.L, default="E")
+        for s in self.obstacles:
+            self.L[s] = "o"
+        if "sT" in self.states:
+            self.L["sT"] = "end"
+
+    def add_obstacle(self, s: tuple) -> None:
+        """
+        Make a cell an obstacle: it is labeled "o" and the agent is stuck in it
+
+        :param s: the cell
+        """
+        if s in self.obstacles:
+            return
+        self.obstacles.append(s)
+        self.L[s] = "o"
+        self.transitions = self.construct_transitions()
+
+    def remove_obstacle(self, s: tuple, label="E") -> None:
+        """
+        Make an obstacle a free cell
+
+        :param s: the obstacle
+        :param label: the new label of the cell, defaults to "E"
+        """
+        self.obstacles.remove(s)
+        self.L[s] = label
+        self.transitions = self.construct_transitions()
 
     def a_array(self, a: int) -> np.array:
         """
@@ -61,14 +171,7 @@ class MDP(object):
 
         :param a: int action
         """
-        if a == 0:
-            return np.asarray([0, 1])
-        elif a == 1:
-            return np.asarray([1, 0])
-        elif a == 2:
-            return np.asarray([0, -1])
-        elif a == 3:
-            return np.asarray([-1, 0])
+        return MOVES[a]
 
     def deterministic_transition(self, s: tuple, a: int) -> tuple:
         """
@@ -95,61 +198,98 @@ class MDP(object):
         """
         if hasattr(self, "obstacles") and s in self.obstacles and a != "aT":
             return s
-        next_possible_states = list(self.transitions[s][a].keys())
+        row = self.states.index(s) * len(self.actions) + self.actions.index(a)
+        try:
+            ns = self.transition_sampler().sample(row, self.rng)
+        except ValueError:
+            raise ValueError("s: {}, a: {}, P: {}".format(s, a, self.transitions[s][a]))
+        return self.states[ns]
 
-        probability_distribution = [
-            self.transitions[s][a][ns] for ns in next_possible_states
-        ]
+    def grid_transition_arrays(self) -> tuple:
+        """
+        Compute the grid transitions of all the cells and all the grid actions at once.
+        Cells are indexed in the order of construct_states, i.e., (x, y) has the index x * height + y.
 
-        try:
-            index = np.random.choice(
-                a=range(len(next_possible_states)), p=probability_distribution
-            )
-        except:
-            raise ValueError(
-                "s: {}, a: {}, P: {}".format(s, a, probability_distribution)
-            )
-        return next_possible_states[index]
+        :return: the cell indices, action indices, next cell indices and probabilities, one entry per transition
+        """
+        width, height = self.grid_world_size
+        grid_actions = np.asarray([a for a in self.actions if a != "aT"])
+        cells = np.indices((width, height)).reshape(2, -1).T
+
+        # the intended move and the two slips of every (cell, action): shape (|cells|, |actions|, 3, 2)
+        moves = cells[:, None, None, :] + MOVES_WITH_SLIPS[grid_actions][None, :, :, :]
+        inside = np.all((moves >= 0) & (moves < [width, height]), axis=-1)
+        cell_index = np.arange(width * height)
+        targets = np.where(
+            inside, moves[..., 0] * height + moves[..., 1], cell_index[:, None, None]
+        )
+
+        blocked = np.zeros(width * height, dtype=bool)
+        for x, y in self.obstacles:
+            blocked[x * height + y] = True
+        # the agent is stuck in an obstacle under the grid actions
+        targets[blocked] = cell_index[blocked][:, None, None]
+
+        intended, slip_1, slip_2 = targets[..., 0], targets[..., 1], targets[..., 2]
+        valid_1 = slip_1 != intended
+        valid_2 = (slip_2 != intended) & (slip_2 != slip_1)
+        p_intended = 1 - self.randomness * (valid_1.astype(int) + valid_2)
+
+        shape = intended.shape
+        s_index = np.broadcast_to(cell_index[:, None], shape)
+        a_index = np.broadcast_to(np.arange(len(grid_actions))[None, :], shape)
+        return (
+            np.concatenate([s_index.ravel(), s_index[valid_1], s_index[valid_2]]),
+            np.concatenate([a_index.ravel(), a_index[valid_1], a_index[valid_2]]),
+            np.concatenate([intended.ravel(), slip_1[valid_1], slip_2[valid_2]]),
+            np.concatenate(
+                [
+                    p_intended.ravel(),
+                    np.full(valid_1.sum(), self.randomness),
+                    np.full(valid_2.sum(), self.randomness),
+                ]
+            ),
+        )
 
     def construct_transitions(
         self,
-    ) -> defaultdict:
+    ) -> csr_matrix:
         """
         Construct the probabilistic transition function
 
         :return: the transition probability matrix of the mdp
         """
-        transitions = defaultdict(lambda: defaultdict(dict))
-
-        for s, a in product(self.states, self.actions):
-            n_d_s = self.deterministic_transition(s, a)
-            if s in self.obstacles:
-                if n_d_s == s:
-                    transitions[s][a][s] = 1
-                else:
-                    transitions[s][a][s] = self.stuck_prob
-                    transitions[s][a][n_d_s] = 1 - self.stuck_prob
-            else:
-                neighbors = self.neighbors(s, a)
-
-                sum_prob = 0
-                for ns in neighbors:
-                    if ns != n_d_s:
-                        transitions[s][a][ns] = self.randomness
-                        sum_prob += self.randomness
-                transitions[s][a][n_d_s] = 1 - sum_prob
+        grid_actions = [a for a in self.actions if a != "aT"]
+        s_index, a_index, ns_index, probs = self.grid_transition_arrays()
+
         if "sT" not in self.states:
             self.states.append("sT")
         if "aT" not in self.actions:
             self.actions.append("aT")
-
-        for a in self.actions:
-            transitions["sT"][a]["sT"] = 1
-
-        for s in self.states:
-            transitions[s]["aT"]["sT"] = 1
-
-        return transitions
+        num_states, num_actions = len(self.states), len(self.actions)
+        sink, stop = self.states.index("sT"), self.actions.index("aT")
+        actions = np.asarray([self.actions.index(a) for a in grid_actions])
+
+        # sT is absorbing under every action, and aT leads every state to sT
+        rows = np.concatenate(
+            [
+                s_index * num_actions + actions[a_index],
+                sink * num_actions + np.arange(num_actions),
+                np.arange(num_states) * num_actions + stop,
+            ]
+        )
+        cols = np.concatenate(
+            [ns_index, np.full(num_actions, sink), np.full(num_states, sink)]
+        )
+        data = np.concatenate([probs, np.ones(num_actions), np.ones(num_states)])
+
+        # the entry (sT, aT) is listed twice
+        keep = np.ones(len(rows), dtype=bool)
+        keep[len(probs) + stop] = False
+        return csr_matrix(
+            (data[keep], (rows[keep], cols[keep])),
+            shape=(num_states * num_actions, num_states),
+        )
 
     def neighbors(self, s: tuple, a: int) -> set:
         """
@@ -189,6 +329,63 @@ class MDP(object):
         )
         return neighbors_set
 
+    def proposition_bits(self) -> dict:
+        """
+        Return the bit of every atomic proposition in the label bitmasks, see label_masks
+        """
+        labels = self.L.labels if isinstance(self.L, Labeling) else set(self.L.values())
+        return proposition_bits(self.AP, labels)
+
+    def label_masks(self, bits: dict = None) -> np.ndarray:
+        """
+        Return the labels of the states as integer bitmasks, the proposition p being the bit bits[p]
+
+        :param bits: the bit of every proposition, defaults to proposition_bits()
+        :return: the array of bitmasks indexed by the state ids
+        """
+        if bits is None:
+            bits = self.proposition_bits()
+        if isinstance(self.L, Labeling) and self.L.states is self.states:
+            return self.L.masks(bits)
+        return encode_labels((self.L[s] for s in self.states), bits)
+
+    def label_state_ids(self, label) -> np.ndarray:
+        """
+        Return the sorted ids of the states with a label, from the index of the labeling function if it is a
+        Labeling, by a scan of the states otherwise, e.g., for the dictionary of the quotient of a bisimulation
+
+        :param label: the label
+        :return: the array of state ids
+        """
+        if isinstance(self.L, Labeling) and self.L.states is self.states:
+            return self.L.state_ids(label)
+        label = label if isinstance(label, str) else frozenset(label)
+        return np.asarray(
+            [i for i, s in enumerate(self.states) if self.L.get(s) == label], dtype=np.int64
+        )
+
+    def reward_vector(self) -> np.ndarray:
+        """
+        Return the reward function as a vector aligned with the rows of the transition matrix
+
+        :return: the vector whose entry s * |A| + a is the reward of state s and action a
+        """
+        reward = np.zeros(len(self.states) * len(self.actions))
+        for (s, a), r in getattr(self, "reward", {}).items():
+            if r and s in self.states and a in self.actions:
+                reward[self.states.index(s) * len(self.actions) + self.actions.index(a)] = r
+        return reward
+
+    def qualitative_sets(self) -> QualitativeSets:
+        """
+        Return the qualitative analysis of the mdp: the states whose values are known from the graph, e.g., the
+        states of a product which cannot reach an accepting state, and the states which reach a rewarded state
+        almost surely
+
+        :return: the qualitative sets
+        """
+        return QualitativeSets(self)
+
     def transition_matrix_str(self, fmt: str):
         """
         Return the transition matrix of the MDP given the format
@@ -214,6 +411,18 @@ class MDP(object):
         self.actions.remove("aT")
         self.transitions = self.construct_transitions()
 
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # the sampling tables are rebuilt on demand
+        state.pop("_sampler", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        # the mdps pickled before the transition matrix was a property
+        if "transition_matrix" in state:
+            state["_transition_matrix"] = state.pop("transition_matrix")
+        self.__dict__.update(state)
+
     def __str__(self, fmt="presto"):
         data = [
             ["S", self.states],
@@ -0,0 +1,189 @@
+import numpy as np
+from scipy.sparse import csr_matrix, identity, kron
+from tabulate import tabulate
+
+
+def state_graph(transition_matrix: csr_matrix, num_actions: int) -> csr_matrix:
+    """
+    Return the graph of the states, with an edge from s to ns if P(ns | s, a) > 0 for some action a
+
+    :param transition_matrix: the (|S| * |A|) x |S| transition matrix
+    :param num_actions: the number of actions
+    :return: the |S| x |S| adjacency matrix
+    """
+    num_states = transition_matrix.shape[1]
+    merge = kron(identity(num_states), np.ones((1, num_actions)), format="csr")
+    graph = (merge @ (transition_matrix != 0).astype(np.int8)).tocsr()
+    graph.data[:] = 1
+    return graph
+
+
+def backward_reachable(graph: csr_matrix, targets: np.ndarray) -> np.ndarray:
+    """
+    Return the states which can reach the targets, by a backward breadth-first search
+
+    :param graph: the adjacency matrix of the states
+    :param targets: the boolean mask of the targets
+    :return: the boolean mask of the states with a path to a target
+    """
+    predecessors = graph.T.tocsr()
+    reached = np.asarray(targets, dtype=bool).copy()
+    frontier = np.flatnonzero(reached)
+    while frontier.size:
+        candidates = np.unique(predecessors[frontier].indices)
+        frontier = candidates[~reached[candidates]]
+        reached[frontier] = True
+    return reached
+
+
+def prob0(graph: csr_matrix, targets: np.ndarray) -> np.ndarray:
+    """
+    Return the states which reach the targets with probability 0 under every policy
+
+    :param graph: the adjacency matrix of the states
+    :param targets: the boolean mask of the targets
+    :return: the boolean mask of the states
+    """
+    return ~backward_reachable(graph, targets)
+
+
+def prob1e(
+    transition_matrix: csr_matrix, num_actions: int, targets: np.ndarray
+) -> np.ndarray:
+    """
+    Return the states which reach the targets with probability 1 under some policy, by the greatest fixpoint over
+    the states U that can stay in U while making progress to the targets with positive probability. The states are
+    removed from U in place: a backward search from the targets over the rows which surely stay in U finds the
+    states without progress, and the removal of a state makes the rows entering it unsafe, which removes in turn,
+    by a worklist, the other states left without a safe row. A new search is only needed when the worklist is empty.
+
+    :param transition_matrix: the (|S| * |A|) x |S| transition matrix
+    :param num_actions: the number of actions
+    :param targets: the boolean mask of the targets
+    :return: the boolean mask of the states
+    """
+    # the rows entering every state
+    predecessors = (transition_matrix != 0).T.tocsr()
+    targets = np.asarray(targets, dtype=bool)
+    u = np.ones(len(targets), dtype=bool)
+    # the rows which surely stay in u, and their number for every state
+    safe = np.ones(transition_matrix.shape[0], dtype=bool)
+    num_safe = np.full(len(targets), num_actions)
+    while True:
+        r = targets.copy()
+        frontier = np.flatnonzero(r)
+        while frontier.size:
+            rows = np.unique(predecessors[frontier].indices)
+            candidates = np.unique(rows[safe[rows]] // num_actions)
+            frontier = candidates[~r[candidates]]
+            r[frontier] = True
+        removed = np.flatnonzero(u & ~r)
+        if not removed.size:
+            return u
+
+        while removed.size:
+            u[removed] = False
+            rows = np.unique(predecessors[removed].indices)
+            rows = rows[safe[rows]]
+            safe[rows] = False
+            owners, counts = np.unique(rows // num_actions, return_counts=True)
+            num_safe[owners] -= counts
+            removed = owners[u[owners] & ~targets[owners] & (num_safe[owners] == 0)]
+
+
+class QualitativeSets(object):
+    """
+    The qualitative analysis of an mdp with nonnegative rewards. It finds the states whose optimal values are known
+    from the graph alone:
+
+    - zero: the states which cannot reach a state-action pair with a positive reward, whose value is 0,
+    - final: the states where the largest reachable reward is an immediate reward that ends the rewards, e.g.,
+      the aT of an accepting product state, whose value is that reward,
+
+    and the states which reach a rewarded state almost surely under some policy, to debug infeasible specifications.
+    The other states, the maybe states, are left to the solvers.
+    """
+
+    def __init__(self, mdp) -> None:
+        """
+        Initialization
+
+        :param mdp: the mdp or product mdp
+        """
+        self.mdp = mdp
+        num_states, num_actions = len(mdp.states), len(mdp.actions)
+        matrix = mdp.transition_matrix
+        reward = mdp.reward_vector().reshape(num_states, num_actions)
+        graph = state_graph(matrix, num_actions)
+
+        positive = reward > 0
+        self.rewarded = positive.any(axis=1)
+        self.zero = prob0(graph, self.rewarded)
+
+        self.fixed_value = np.zeros(num_states)
+        self.final = np.zeros(num_states, dtype=bool)
+        if (reward < 0).any():
+            # the values of the states which cannot reach a reward are unknown with costs
+            self.zero[:] = False
+            return
+
+        # a rewarded row ends the rewards if all its successors are in zero, otherwise the reward may be repeated
+        ends = (
+            (matrix.astype(bool).astype(np.int64) @ (~self.zero).astype(np.int64) == 0)
+            .reshape(num_states, num_actions)
+        )
+        repeated = positive & ~ends
+        once = ~backward_reachable(graph, repeated.any(axis=1))
+
+        # the largest reward reachable from every state, a backward search per reward level
+        best = np.zeros(num_states)
+        for level in np.unique(reward[positive]):
+            best[backward_reachable(graph, (reward >= level).any(axis=1))] = level
+
+        immediate = np.where(positive & ends, reward, 0).max(axis=1)
+        self.final = once & self.rewarded & (immediate >= best)
+        self.fixed_value[self.final] = immediate[self.final]
+
+    @property
+    def almost_sure(self) -> np.ndarray:
+        """
+        The boolean mask of the states which reach a rewarded state almost surely under some policy, computed on the
+        first access since no solver needs it
+        """
+        if getattr(self, "_almost_sure", None) is None:
+            self._almost_sure = prob1e(
+                self.mdp.transition_matrix, len(self.mdp.actions), self.rewarded
+            )
+        return self._almost_sure
+
+    @property
+    def fixed(self) -> np.ndarray:
+        """
+        The boolean mask of the states with known values
+        """
+        return self.zero | self.final
+
+    @property
+    def maybe(self) -> np.ndarray:
+        """
+        The ids of the states left to the solvers
+        """
+        return np.flatnonzero(~self.fixed)
+
+    def decode(self, mask: np.ndarray) -> list:
+        """
+        Return the states of a mask, e.g., decode(sets.zero)
+
+        :param mask: the boolean mask over the state ids
+        :return: the list of states
+        """
+        return [self.mdp.states[i] for i in np.flatnonzero(mask)]
+
+    def __str__(self, fmt="presto"):
+        data = [
+            ["zero", np.count_nonzero(self.zero)],
+            ["final", np.count_nonzero(self.final)],
+            ["maybe", len(self.maybe)],
+            ["almost sure", np.count_nonzero(self.almost_sure)],
+        ]
+        return tabulate(data, headers=["set", "number of states"], tablefmt=fmt)
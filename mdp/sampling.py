@@ -0,0 +1,53 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class TransitionSampler(object):
+    """
+    The cumulative distributions of all the rows of a transition matrix, built once to sample successors without
+    building a distribution per call. The successor of the row r for a uniform draw u in [0, 1) is the first entry of
+    the row whose cumulative probability exceeds u, found by a binary search within the row. The searches of any
+    number of rows run together, in a number of rounds logarithmic in the length of the longest row.
+    """
+
+    def __init__(self, transition_matrix: csr_matrix) -> None:
+        """
+        Initialization
+
+        :param transition_matrix: the (|S| * |A|) x |S| transition matrix
+        """
+        matrix = transition_matrix.copy()
+        matrix.eliminate_zeros()
+        counts = np.diff(matrix.indptr)
+        owner = np.repeat(np.arange(matrix.shape[0]), counts)
+        cumulative = np.cumsum(matrix.data)
+        start = np.concatenate([[0.0], cumulative])[matrix.indptr[:-1]]
+        self.cdf = cumulative - start[owner]
+        # the last entry of every row is exactly 1, which absorbs the rounding errors
+        self.cdf[matrix.indptr[1:][counts > 0] - 1] = 1
+
+        self.indptr = matrix.indptr.astype(np.int64)
+        self.successors = matrix.indices.astype(np.int32)
+        self.empty = counts == 0
+        self.rounds = int(np.ceil(np.log2(counts.max(initial=1))))
+
+    def sample(self, rows, rng: np.random.Generator) -> np.ndarray:
+        """
+        Sample the successors of rows of the transition matrix
+
+        :param rows: the row ids, i.e., s * |A| + a
+        :param rng: the random generator
+        :return: the successor state ids, of the shape of rows
+        """
+        rows = np.asarray(rows)
+        if self.empty[rows].any():
+            raise ValueError("The rows {} have no successors".format(np.unique(rows[self.empty[rows]])))
+        u = rng.random(rows.shape)
+        # the first position in [low, high] whose cumulative probability exceeds u, the last one being 1
+        low, high = self.indptr[rows], self.indptr[rows + 1] - 1
+        for _ in range(self.rounds):
+            middle = (low + high) // 2
+            below = self.cdf[middle] <= u
+            low = np.where(below, middle + 1, low)
+            high = np.where(below, high, middle)
+        return self.successors[low]
@@ -0,0 +1,222 @@
+import numpy as np
+
+
+class StateSpace(object):
+    """
+    An indexed state space: a bidirectional mapping between the states and the integer ids 0, ..., n - 1.
+    It behaves like the list of states, except that membership tests and index lookups take O(1).
+    """
+
+    def __init__(self, states=()) -> None:
+        """
+        Initialization
+
+        :param states: the states, in the order of their ids
+        """
+        self._states = []
+        self._index = {}
+        for s in states:
+            self.append(s)
+
+    def append(self, s) -> None:
+        """
+        Add a state with the next free id
+
+        :param s: the state
+        """
+        if s in self._index:
+            raise ValueError("The state {} is already in the state space.".format(s))
+        self._index[s] = len(self._states)
+        self._states.append(s)
+
+    def remove(self, s) -> None:
+        """
+        Remove a state. The ids of the states after it are shifted by one.
+
+        :param s: the state
+        """
+        i = self.index(s)
+        del self._states[i]
+        del self._index[s]
+        for j in range(i, len(self._states)):
+            self._index[self._states[j]] = j
+
+    def index(self, s) -> int:
+        """
+        Return the id of the state
+
+        :param s: the state
+        :return: the id
+        """
+        try:
+            return self._index[s]
+        except (KeyError, TypeError):
+            raise ValueError("{} is not in the state space".format(s))
+
+    def encode(self, states) -> np.ndarray:
+        """
+        Return the ids of the given states
+
+        :param states: an iterable of states
+        :return: the array of ids
+        """
+        return np.fromiter((self.index(s) for s in states), dtype=np.int64)
+
+    def decode(self, ids) -> list:
+        """
+        Return the states of the given ids
+
+        :param ids: an iterable of ids
+        :return: the list of states
+        """
+        return [self[i] for i in np.asarray(ids).ravel()]
+
+    def __getitem__(self, i):
+        return self._states[i]
+
+    def __contains__(self, s) -> bool:
+        try:
+            return s in self._index
+        except TypeError:
+            return False
+
+    def __iter__(self):
+        return iter(self._states)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(self._states)
+
+
+class GridStateSpace(StateSpace):
+    """
+    The state space of a grid world: the cell (x, y) has the id x * height + y, followed by the extra states, e.g. sT.
+    """
+
+    def __init__(self, grid_world_size: list) -> None:
+        """
+        Initialization
+
+        :param grid_world_size: the width and height of the grid world
+        """
+        self.grid_world_size = tuple(grid_world_size)
+        width, height = self.grid_world_size
+        super(GridStateSpace, self).__init__(
+            (x, y) for x in range(width) for y in range(height)
+        )
+
+    def encode_cells(self, cells) -> np.ndarray:
+        """
+        Return the ids of the cells
+
+        :param cells: the integer array of cells of shape (n, 2)
+        :return: the array of ids
+        """
+        cells = np.asarray(cells)
+        return cells[..., 0] * self.grid_world_size[1] + cells[..., 1]
+
+    def decode_cells(self, ids) -> np.ndarray:
+        """
+        Return the cells of the ids, which must not be extra states
+
+        :param ids: the array of ids
+        :return: the integer array of cells of shape (n, 2)
+        """
+        return np.stack(np.divmod(np.asarray(ids), self.grid_world_size[1]), axis=-1)
+
+
+class ProductStateSpace(StateSpace):
+    """
+    The state space of a product: the state (s, q) has the mixed-radix code s_id * |Q| + q_id, given the base space of
+    s and the automaton space of q. Either all the codes are states and the ids are the codes, or only the given codes
+    are states and the ids are their positions in the sorted codes.
+    """
+
+    def __init__(self, base: StateSpace, automaton: StateSpace, codes=None) -> None:
+        """
+        Initialization
+
+        :param base: the state space of the base mdp
+        :param automaton: the state space of the automaton
+        :param codes: the codes of the states if only a subset of the product is kept, defaults to None
+        """
+        self.base = base
+        self.automaton = automaton
+        self.codes = None if codes is None else np.unique(codes)
+
+    def append(self, s) -> None:
+        raise TypeError("A product state space is fixed by its factors.")
+
+    def remove(self, s) -> None:
+        raise TypeError("A product state space is fixed by its factors.")
+
+    def index(self, s) -> int:
+        try:
+            (v, q) = s
+        except (TypeError, ValueError):
+            raise ValueError("{} is not in the state space".format(s))
+        code = self.base.index(v) * len(self.automaton) + self.automaton.index(q)
+        if self.codes is None:
+            return code
+        i = np.searchsorted(self.codes, code)
+        if i == len(self.codes) or self.codes[i] != code:
+            raise ValueError("{} is not in the state space".format(s))
+        return int(i)
+
+    def encode_pairs(self, base_ids, automaton_ids) -> np.ndarray:
+        """
+        Return the ids of the product states given the ids of their components, which must be in the state space
+
+        :param base_ids: the ids in the base state space
+        :param automaton_ids: the ids in the automaton state space
+        :return: the array of ids
+        """
+        codes = np.asarray(base_ids) * len(self.automaton) + np.asarray(automaton_ids)
+        if self.codes is None:
+            return codes
+        return np.searchsorted(self.codes, codes)
+
+    def split(self, ids) -> tuple:
+        """
+        Return the ids of the components of the product states
+
+        :param ids: the ids of the product states
+        :return: the ids in the base state space and the ids in the automaton state space
+        """
+        codes = np.asarray(ids) if self.codes is None else self.codes[ids]
+        return np.divmod(codes, len(self.automaton))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("state id out of range")
+        v, q = self.split(i)
+        return self.base[v], self.automaton[q]
+
+    def __contains__(self, s) -> bool:
+        try:
+            self.index(s)
+        except ValueError:
+            return False
+        return True
+
+    def __iter__(self):
+        if self.codes is None:
+            return ((v, q) for v in self.base for q in self.automaton)
+        return (self[i] for i in range(len(self)))
+
+    def __len__(self) -> int:
+        if self.codes is None:
+            return len(self.base) * len(self.automaton)
+        return len(self.codes)
+
+    def __repr__(self) -> str:
+        return "ProductStateSpace({!r}, {!r})".format(self.base, self.automaton)
@@ -0,0 +1,121 @@
+import warnings
+from collections.abc import Mapping
+
+import numpy as np
+from scipy.sparse import SparseEfficiencyWarning, csr_matrix
+
+
+def transition_matrix_from_dict(transitions, states, actions: list) -> csr_matrix:
+    """
+    Convert a nested transition dictionary transitions[s][a][ns] into the stacked transition matrix
+
+    :param transitions: the nested transition dictionary
+    :param states: the state space, defining the state ids
+    :param actions: the list of actions, defining the action ids
+    :return: the (|S| * |A|) x |S| transition matrix, the row of (s, a) is s * |A| + a
+    """
+    action_index = {a: k for k, a in enumerate(actions)}
+    rows, cols, probs = [], [], []
+    for s in transitions:
+        for a in transitions[s]:
+            for ns, p in transitions[s][a].items():
+                rows.append(states.index(s) * len(actions) + action_index[a])
+                cols.append(states.index(ns))
+                probs.append(p)
+    return csr_matrix(
+        (np.asarray(probs, dtype=float), (rows, cols)),
+        shape=(len(states) * len(actions), len(states)),
+    )
+
+
+class TransitionView(Mapping):
+    """
+    A lazy view of the stacked transition matrix of a MDP which keeps the transitions[s][a][ns] access.
+    Probabilities can be assigned through the view, e.g. transitions[s][a][ns] = 0; they are written to the matrix.
+    """
+
+    def __init__(self, mdp) -> None:
+        """
+        Initialize the view
+
+        :param mdp: the mdp whose transition matrix is viewed
+        """
+        self._mdp = mdp
+
+    def __getitem__(self, s):
+        try:
+            return _StateTransitions(self._mdp, self._mdp.states.index(s))
+        except ValueError:
+            raise KeyError(s)
+
+    def __iter__(self):
+        return iter(self._mdp.states)
+
+    def __len__(self):
+        return len(self._mdp.states)
+
+
+class _StateTransitions(Mapping):
+    def __init__(self, mdp, i: int) -> None:
+        self._mdp = mdp
+        self._i = i
+
+    def __getitem__(self, a):
+        try:
+            k = self._mdp.actions.index(a)
+        except ValueError:
+            raise KeyError(a)
+        return _ActionTransitions(self._mdp, self._i * len(self._mdp.actions) + k)
+
+    def __iter__(self):
+        return iter(self._mdp.actions)
+
+    def __len__(self):
+        return len(self._mdp.actions)
+
+
+class _ActionTransitions(Mapping):
+    def __init__(self, mdp, row: int) -> None:
+        self._mdp = mdp
+        self._row = row
+
+    def _position(self, ns):
+        """
+        Return the position of ns in the data array of the matrix, or None if (row, ns) is not stored
+        """
+        matrix = self._mdp.transition_matrix
+        start, end = matrix.indptr[self._row], matrix.indptr[self._row + 1]
+        try:
+            j = self._mdp.states.index(ns)
+        except ValueError:
+            return None
+        hit = np.flatnonzero(matrix.indices[start:end] == j)
+        return start + hit[0] if len(hit) else None
+
+    def __getitem__(self, ns):
+        position = self._position(ns)
+        if position is None:
+            raise KeyError(ns)
+        return self._mdp.transition_matrix.data[position]
+
+    def __setitem__(self, ns, p) -> None:
+        position = self._position(ns)
+        if position is None:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", SparseEfficiencyWarning)
+                self._mdp.transition_matrix[self._row, self._mdp.states.index(ns)] = p
+        else:
+            self._mdp.transition_matrix.data[position] = p
+        self._mdp.reset_sampler()
+
+    def __contains__(self, ns):
+        return self._position(ns) is not None
+
+    def __iter__(self):
+        matrix = self._mdp.transition_matrix
+        start, end = matrix.indptr[self._row], matrix.indptr[self._row + 1]
+        return (self._mdp.states[j] for j in matrix.indices[start:end])
+
+    def __len__(self):
+        matrix = self._mdp.transition_matrix
+        return matrix.indptr[self._row + 1] - matrix.indptr[self._row]
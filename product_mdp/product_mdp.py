@@ -1,8 +1,46 @@
-from itertools import product
 from collections import defaultdict
+import numpy as np
+from scipy.sparse import csr_matrix
 
 from mdp.mdp import MDP
-from wdfa.wdfa import WDFA
+from mdp.state_space import ProductStateSpace, StateSpace
+from wdfa.compact import CompactWDFA
+
+
+def product_successors(
+    base_matrix: csr_matrix,
+    labels: np.ndarray,
+    delta: np.ndarray,
+    num_actions: int,
+    codes: np.ndarray,
+) -> tuple:
+    """
+    Compute the transitions of the given product states with gathers from the base transition matrix: the product
+    state (s, q) moves to (ns, delta[q, labels[ns]]) with the probability of moving from s to ns.
+    A product state is identified by its mixed-radix code s * |Q| + q.
+
+    :param base_matrix: the (|S| * |A|) x |S| transition matrix of the base mdp
+    :param labels: the symbol id of the label of every base state
+    :param delta: the automaton transition table, delta[q, a] is the id of the next automaton state
+    :param num_actions: the number of actions
+    :param codes: the codes of the product states to expand
+    :return: the number of transitions of every (code, action) in the order of codes and actions, and the next
+        codes and probabilities of all the transitions in the same order
+    """
+    num_q = delta.shape[0]
+    v, q = np.divmod(np.asarray(codes, dtype=np.int64), num_q)
+
+    # the base rows of the product rows (code, action), in the order of the product rows
+    base_rows = (v[:, None] * num_actions + np.arange(num_actions)[None, :]).ravel()
+    lengths = np.diff(base_matrix.indptr)[base_rows]
+    row_starts = np.cumsum(lengths) - lengths
+    pointers = np.repeat(base_matrix.indptr[base_rows] - row_starts, lengths) + np.arange(
+        lengths.sum()
+    )
+
+    nv = base_matrix.indices[pointers]
+    nq = delta[np.repeat(np.repeat(q, num_actions), lengths), labels[nv]]
+    return lengths, nv * num_q + nq, base_matrix.data[pointers]
 
 
 class ProductMDP(MDP):
@@ -10,26 +48,41 @@ class ProductMDP(MDP):
     A product Markov Decision Process inherited from base case Markov Decision Process."
     """
 
-    def __init__(self, mdp: MDP, wdfa: WDFA):
+    def __init__(self, mdp: MDP, wdfa, reachable: bool = False):
         """
         Initialization
 
         :param mdp: the label Markov Decision Process
-        :param wdfa: the weighed deterministic finite state automaton
+        :param wdfa: the weighed deterministic finite state automaton, a WDFA or a CompactWDFA
+        :param reachable: whether to keep only the product states reachable from the initial state, defaults to False
         """
         self._mdp = mdp
         self._wdfa = wdfa
+        # the product is built from the integer tables of the automaton
+        self._automaton = (
+            wdfa if isinstance(wdfa, CompactWDFA) else CompactWDFA.from_wdfa(wdfa)
+        )
+        automaton = self._automaton
 
+        # the tables are built once and passed to the constructions
+        tables = self.automaton_tables()
+        labels, delta, _ = tables
         init = (
             mdp.init,
-            self._wdfa.transitions[wdfa.initial_state][mdp.L[mdp.init]],
+            automaton.states[
+                delta[automaton.initial_id, labels[mdp.states.index(mdp.init)]]
+            ],
         )
 
-        states = [(s, q) for (s, q) in product(self._mdp.states, self._wdfa.states)]
+        if reachable:
+            states, transitions = self.construct_reachable_transitions(init, mdp.actions, tables)
+        else:
+            states = ProductStateSpace(StateSpace(mdp.states), automaton.states)
+            transitions = self.construct_transitions(states, mdp.actions, tables)
+        # the number of product states which are not kept since they are unreachable
+        self.num_pruned_states = len(mdp.states) * len(automaton.states) - len(states)
 
-        transitions = self.construct_transitions(states, mdp.actions)
-
-        reward = self.construct_rewards(states, mdp.actions)
+        reward = self.construct_rewards(states, mdp.actions, tables)
 
         super(ProductMDP, self).__init__(
             init=init,
@@ -42,28 +95,101 @@ class ProductMDP(MDP):
             L=mdp.L,
         )
 
-    def construct_rewards(self, states: list, actions: list) -> defaultdict:
-        reward = defaultdict(float)
-        for v, a in product(states, actions):
-            (s, q) = v
-            if (
-                (a == "aT")
-                and (q != "sink")
-                and (self._wdfa.weight[q, "end", "sink"] > 0)
-            ):
-                reward[(s, q), a] = (
-                    self._wdfa.opt - self._wdfa.weight[q, "end", "sink"] + 1
-                )
-        return reward
-
-    def construct_transitions(self, states: list, actions: list) -> defaultdict:
-        transitions = defaultdict(lambda: defaultdict(dict))
-
-        for v, a, nv in product(states, actions, states):
-            (s, q), (ns, nq) = v, nv
-            if ns in self._mdp.transitions[s][a]:
-                transitions[s, q][a][ns, nq] = self._mdp.transitions[s][a][ns] * (
-                    nq == self._wdfa.transitions[q][self._mdp.L[ns]]
-                )
-
-        return transitions
+    def automaton_tables(self) -> tuple:
+        """
+        Return the integer tables of the automaton
+
+        :return: the column of the label of every base state, the automaton transition table over the distinct label
+            bitmasks and the weight of the end transition of every automaton state
+        """
+        automaton = self._automaton
+        bits = self._mdp.proposition_bits()
+        labels, delta = automaton.label_table(self._mdp.label_masks(bits), bits)
+        return labels, delta, automaton.end_weight
+
+    def construct_rewards(
+        self, states: ProductStateSpace, actions: list, tables: tuple
+    ) -> defaultdict:
+        _, _, end_weight = tables
+        ids = np.arange(len(states))
+        weight = end_weight[states.split(ids)[1]]
+        rewarded = ids[weight > 0]
+
+        v, q = states.split(rewarded)
+        rewarded_states = zip(
+            map(states.base.__getitem__, v.tolist()),
+            map(states.automaton.__getitem__, q.tolist()),
+        )
+        return defaultdict(
+            float,
+            zip(
+                ((s, "aT") for s in rewarded_states),
+                (self._automaton.opt - weight[rewarded] + 1).tolist(),
+            ),
+        )
+
+    def construct_transitions(
+        self, states: ProductStateSpace, actions: list, tables: tuple
+    ) -> csr_matrix:
+        labels, delta, _ = tables
+        lengths, next_codes, probs = product_successors(
+            self._mdp.transition_matrix,
+            labels,
+            delta,
+            len(actions),
+            np.arange(len(states)),
+        )
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        return csr_matrix(
+            (probs, next_codes, indptr),
+            shape=(len(states) * len(actions), len(states)),
+        )
+
+    def construct_reachable_transitions(self, init: tuple, actions: list, tables: tuple) -> tuple:
+        """
+        Construct the transitions of the product states reachable from the initial state by a breadth-first search
+        over the support of the base mdp, expanding a whole layer of the search at once
+
+        :param init: the initial product state
+        :param actions: the actions
+        :param tables: the tables of the automaton, see automaton_tables
+        :return: the state space of the reachable product states and their transition matrix
+        """
+        base_states = StateSpace(self._mdp.states)
+        automaton_states = self._automaton.states
+        labels, delta, _ = tables
+        num_q = len(automaton_states)
+
+        visited = np.zeros(len(base_states) * num_q, dtype=bool)
+        frontier = np.asarray(
+            [base_states.index(init[0]) * num_q + automaton_states.index(init[1])]
+        )
+        visited[frontier] = True
+        rows, cols, probs = [], [], []
+
+        while len(frontier):
+            lengths, next_codes, layer_probs = product_successors(
+                self._mdp.transition_matrix, labels, delta, len(actions), frontier
+            )
+            product_rows = (
+                frontier[:, None] * len(actions) + np.arange(len(actions))[None, :]
+            ).ravel()
+            rows.append(np.repeat(product_rows, lengths))
+            cols.append(next_codes)
+            probs.append(layer_probs)
+
+            frontier = np.unique(next_codes[~visited[next_codes]])
+            visited[frontier] = True
+
+        states = ProductStateSpace(
+            base_states, automaton_states, codes=np.flatnonzero(visited)
+        )
+        # map the codes to the ids of the reachable states
+        position = np.cumsum(visited) - 1
+        state_rows, action_rows = np.divmod(np.concatenate(rows), len(actions))
+        rows = position[state_rows] * len(actions) + action_rows
+        cols = position[np.concatenate(cols)]
+        return states, csr_matrix(
+            (np.concatenate(probs), (rows, cols)),
+            shape=(len(states) * len(actions), len(states)),
+        )
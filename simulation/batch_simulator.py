@@ -0,0 +1,231 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from mdp.mdp import MDP
+from mdp.sampling import TransitionSampler
+from simulation.simulator import terminal_mask
+from simulation.trajectories import Trajectories, TrajectoryWriter
+
+# the number of trajectories sampled from one seed, which fixes the results whatever the number of workers
+CHUNK_SIZE = 2 ** 14
+
+
+def chunk_sizes(number: int, first: int = CHUNK_SIZE) -> list:
+    """
+    Return the sizes of the chunks of a number of trajectories: first, then doubling up to CHUNK_SIZE
+
+    :param number: the number of trajectories
+    :param first: the size of the first chunk, defaults to CHUNK_SIZE
+    :return: the list of sizes
+    """
+    sizes, size = [], min(first, CHUNK_SIZE)
+    while number > 0:
+        sizes.append(min(size, number))
+        number -= sizes[-1]
+        size = min(2 * size, CHUNK_SIZE)
+    return sizes
+
+
+class SimulationTables(object):
+    """
+    The arrays needed to simulate a policy: the sampling tables of the transitions, the action id of every state id,
+    the mask of the terminal states and the initial state id. They are all a worker process needs.
+    """
+
+    def __init__(
+        self,
+        sampler: TransitionSampler,
+        policy_vector: np.ndarray,
+        terminal: np.ndarray,
+        init_id: int,
+        num_actions: int,
+    ) -> None:
+        """
+        Initialization
+
+        :param sampler: the sampling tables of the transitions
+        :param policy_vector: the action id of every state id, -1 where there is no action
+        :param terminal: the mask of the terminal states
+        :param init_id: the initial state id
+        :param num_actions: the number of actions
+        """
+        self.sampler = sampler
+        self.policy_vector = policy_vector
+        self.terminal = terminal
+        self.init_id = init_id
+        self.num_actions = num_actions
+
+    def step(self, states: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Sample the next states of a batch of states following the policy
+
+        :param states: the state ids
+        :param rng: the random generator
+        :return: the next state ids
+        """
+        actions = self.policy_vector[states]
+        if (actions < 0).any():
+            raise ValueError("The policy has no action in the state {}".format(states[actions < 0][0]))
+        return self.sampler.sample(states.astype(np.int64) * self.num_actions + actions, rng)
+
+    def run(self, number: int, rng: np.random.Generator, max_steps: int = None) -> tuple:
+        """
+        Simulate trajectories in lockstep from the initial state until they reach a terminal state
+
+        :param number: the number of trajectories
+        :param rng: the random generator
+        :param max_steps: the maximal number of steps, defaults to None for no limit
+        :return: the concatenated state ids, the offsets and the mask of the finished trajectories
+        """
+        current = np.full(number, self.init_id, dtype=np.int32)
+        running = np.flatnonzero(~self.terminal[current])
+        visited_ids, visited_states = [np.arange(number)], [current.copy()]
+        steps = 0
+        while running.size and (max_steps is None or steps < max_steps):
+            current[running] = self.step(current[running], rng)
+            visited_ids.append(running)
+            visited_states.append(current[running])
+            running = running[~self.terminal[current[running]]]
+            steps += 1
+
+        ids = np.concatenate(visited_ids)
+        # the steps are in order, and the stable sort keeps them in order within every trajectory
+        order = np.argsort(ids, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(ids, minlength=number))])
+        return np.concatenate(visited_states)[order], offsets, self.terminal[current]
+
+
+# the tables of a worker process, sent once by the initializer of the pool
+_worker_tables = None
+
+
+def _init_worker(tables: SimulationTables) -> None:
+    global _worker_tables
+    _worker_tables = tables
+
+
+def _run_chunk(number: int, seed: np.random.SeedSequence, max_steps: int) -> tuple:
+    return _worker_tables.run(number, np.random.default_rng(seed), max_steps)
+
+
+class BatchSimulator(object):
+    """
+    A Monte Carlo simulator advancing a batch of trajectories in lockstep. The trajectories are integer state ids,
+    the transitions are sampled from the cumulative tables of the mdp, see MDP.transition_sampler, and every step
+    draws one uniform number per running trajectory at once. A trajectory stops at sT, an obstacle or the target.
+    The trajectories are sampled in chunks of CHUNK_SIZE, each from its own child of the seed sequence, so the chunks
+    may run in parallel processes with the same results.
+    """
+
+    def __init__(self, mdp: MDP, policy: dict, target=None, seed=None) -> None:
+        """
+        Initialization
+
+        :param mdp: MDP or product mdp
+        :param policy: the policy
+        :param target: the target of the MDP, defaults to None
+        :param seed: the seed, an int or a SeedSequence, defaults to None to draw it from the generator of the mdp
+        """
+        self.mdp = mdp
+        self.policy = policy
+        self.target = target
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(
+                mdp.rng.integers(2 ** 63, size=4) if seed is None else seed
+            )
+        self.seed_sequence = seed
+
+        self.tables = SimulationTables(
+            sampler=mdp.transition_sampler(),
+            policy_vector=np.asarray(
+                [mdp.actions.index(policy[s]) if s in policy else -1 for s in mdp.states],
+                dtype=np.int64,
+            ),
+            terminal=terminal_mask(mdp, target),
+            init_id=mdp.states.index(mdp.init),
+            num_actions=len(mdp.actions),
+        )
+
+    @property
+    def terminal(self) -> np.ndarray:
+        """
+        The mask of the terminal states
+        """
+        return self.tables.terminal
+
+    def trajectories(self, states: np.ndarray, offsets: np.ndarray, finished: np.ndarray) -> Trajectories:
+        """
+        Return the trajectories over the states of the mdp
+        """
+        return Trajectories(states, offsets, self.mdp.states, finished)
+
+    def iter_chunks(
+        self, number: int, max_steps: int = None, workers: int = 1, first: int = CHUNK_SIZE
+    ):
+        """
+        Simulate trajectories from the initial state until they reach a terminal state, and yield them in chunks,
+        see chunk_sizes. Small first chunks let a caller stop after a few trajectories. Every call continues the
+        seed sequence, and the results only depend on the seed, the chunk sizes and the previous calls, not on the
+        workers. At most two chunks per worker are pending at any time.
+
+        :param number: the number of trajectories
+        :param max_steps: the maximal number of steps, defaults to None for no limit
+        :param workers: the number of worker processes, defaults to 1 to simulate in this process
+        :param first: the size of the first chunk, defaults to CHUNK_SIZE
+        :return: the iterator of the chunks of trajectories, including their initial and terminal states
+        """
+        sizes = chunk_sizes(number, first)
+        seeds = self.seed_sequence.spawn(len(sizes))
+
+        if workers > 1 and len(sizes) > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(self.tables,)
+            ) as pool:
+                pending = deque()
+                for size, seed in zip(sizes, seeds):
+                    pending.append(pool.submit(_run_chunk, size, seed, max_steps))
+                    if len(pending) >= 2 * workers:
+                        yield self.trajectories(*pending.popleft().result())
+                while pending:
+                    yield self.trajectories(*pending.popleft().result())
+        else:
+            for size, seed in zip(sizes, seeds):
+                yield self.trajectories(
+                    *self.tables.run(size, np.random.default_rng(seed), max_steps)
+                )
+
+    def run(self, number: int, max_steps: int = None, workers: int = 1) -> Trajectories:
+        """
+        Simulate trajectories from the initial state until they reach a terminal state, see iter_chunks
+
+        :param number: the number of trajectories
+        :param max_steps: the maximal number of steps, defaults to None for no limit
+        :param workers: the number of worker processes, defaults to 1 to simulate in this process
+        :return: the trajectories, including their initial and terminal states
+        """
+        chunks = list(self.iter_chunks(number, max_steps, workers))
+        if not chunks:
+            return self.trajectories([], [0], [])
+        lengths = np.concatenate([chunk.lengths for chunk in chunks])
+        return self.trajectories(
+            np.concatenate([chunk.states for chunk in chunks]),
+            np.concatenate([[0], np.cumsum(lengths)]),
+            np.concatenate([chunk.finished for chunk in chunks]),
+        )
+
+    def save(self, path: str, number: int, max_steps: int = None, workers: int = 1) -> int:
+        """
+        Simulate trajectories and stream them to a binary sink chunk by chunk, see TrajectoryWriter
+
+        :param path: the path of the sink, without extension
+        :param number: the number of trajectories
+        :param max_steps: the maximal number of steps, defaults to None for no limit
+        :param workers: the number of worker processes, defaults to 1
+        :return: the number of trajectories in the sink
+        """
+        with TrajectoryWriter(path, self.mdp.states) as writer:
+            for chunk in self.iter_chunks(number, max_steps, workers):
+                writer.write(chunk)
+        return writer.count
@@ -1,6 +1,31 @@
+import numpy as np
+
 from mdp.mdp import MDP
 
 
+def terminal_mask(mdp: MDP, target=None) -> np.ndarray:
+    """
+    Return the mask over the state ids of the states where a simulation stops: sT, the obstacles and the target
+
+    :param mdp: MDP or product mdp
+    :param target: the target of the MDP, defaults to None
+    :return: the boolean array indexed by the state ids
+    """
+    base_mdp = mdp._mdp if hasattr(mdp, "_wdfa") else mdp
+    base_terminal = np.zeros(len(base_mdp.states), dtype=bool)
+    base_terminal[base_mdp.label_state_ids("end")] = True
+    base_terminal[base_mdp.label_state_ids("o")] = True
+
+    if base_mdp is mdp:
+        terminal = base_terminal
+    else:
+        base_ids, _ = mdp.states.split(np.arange(len(mdp.states)))
+        terminal = base_terminal[base_ids]
+    if target:
+        terminal[mdp.states.index(target)] = True
+    return terminal
+
+
 class Simulator(object):
     def __init__(self, mdp: MDP, policy: dict, target=None) -> None:
         """
@@ -24,49 +49,117 @@ class Simulator(object):
         If the mdp is pure mdp, then run simulate_mdp,
         else run simulation_product_mdp
         """
+        self.check_target()
         if hasattr(self.mdp, "_wdfa"):
-            if self.target:
-                raise ValueError("Should not set a target for the product MDP!")
             self.simulate_product_mdp()
         else:
-            if not self.target:
-                raise ValueError("Did not set the target for the pure MDP!")
             self.simulate_mdp()
 
-    def simulate_mdp(self):
-        s = self.mdp.init
-        while not (
-            (s == "sT")
-            or (s in self.mdp.obstacles)
-            or (self.target and s == self.target)
-        ):
-            self.visualizable_trajectory.append(s)
-            s = self.mdp.stochastic_transition(s, self.policy[s])
+    def check_target(self) -> None:
+        """
+        Check that a target is set for a pure MDP, and only for it
+        """
+        if hasattr(self.mdp, "_wdfa"):
+            if self.target:
+                raise ValueError("Should not set a target for the product MDP!")
+        elif not self.target:
+            raise ValueError("Did not set the target for the pure MDP!")
+
+    def terminal_mask(self) -> np.ndarray:
+        """
+        Return the mask over the state ids of the states where a simulation stops: sT, the obstacles and the target
+
+        :return: the boolean array indexed by the state ids
+        """
+        return terminal_mask(self.mdp, self.target)
 
+    def step(self, i: int) -> int:
+        """
+        Sample the next state following the policy
+
+        :param i: the id of the current state
+        :return: the id of the next state
+        """
+        action = self.mdp.actions.index(self.policy[self.mdp.states[i]])
+        row = i * len(self.mdp.actions) + action
+        return int(self.mdp.transition_sampler().sample(row, self.mdp.rng))
+
+    def run(self, project) -> None:
+        """
+        Run a simulation from the initial state until a terminal state is reached
+
+        :param project: the function projecting a state to the state to be visualized
+        """
+        terminal = self.terminal_mask()
+        i = self.mdp.states.index(self.mdp.init)
+        while not terminal[i]:
+            self.visualizable_trajectory.append(project(self.mdp.states[i]))
+            i = self.step(i)
+        s = project(self.mdp.states[i])
         if s != "sT":
             self.visualizable_trajectory.append(s)
 
+    def simulate_mdp(self):
+        self.run(lambda s: s)
+
     def simulate_product_mdp(self):
-        s = self.mdp.init
-        while not (
-            (s[0] == "sT")
-            or (s[0] in self.mdp._mdp.obstacles)
-            or (self.target and s == self.target)
-        ):
-            self.visualizable_trajectory.append(s[0])
-            s = self.mdp.stochastic_transition(s, self.policy[s])
-        if s[0] != "sT":
-            self.visualizable_trajectory.append(s[0])
+        self.run(lambda s: s[0])
+
+    def batch_simulator(self, seed=None):
+        """
+        Return the batch simulator of the mdp and the policy
+
+        :param seed: the seed, defaults to None
+        :return: the batch simulator
+        """
+        # avoid the circular import of the batch simulator
+        from simulation.batch_simulator import BatchSimulator
+
+        self.check_target()
+        return BatchSimulator(self.mdp, self.policy, self.target, seed=seed)
+
+    def project(self, s):
+        """
+        Project a state to the state to be visualized: the base state of a product state
+        """
+        return s[0] if hasattr(self.mdp, "_wdfa") and s != "sT" else s
+
+    def iter_trajectories(self, number: int = 1, workers: int = 1, seed=None):
+        """
+        Simulate given numbers of trajectories and yield them one by one, without keeping them
+
+        :param number: the number of trajectory, defaults to 1
+        :param workers: the number of worker processes, defaults to 1
+        :param seed: the seed, defaults to None
+        :return: the iterator of the trajectories
+        """
+        for chunk in self.batch_simulator(seed).iter_chunks(number, workers=workers):
+            yield from chunk.iter_lists(self.project)
 
-    def sample_trajectories(self, number: int = 1) -> list:
+    def sample_trajectories(self, number: int = 1, workers: int = 1, seed=None) -> list:
         """
-        Simulate given numbers of trajectories.
+        Simulate given numbers of trajectories, in batches, see BatchSimulator. The trajectories only depend on the
+        seed, not on the number of workers.
 
         :param number: the number of trajectory, defaults to 1
+        :param workers: the number of worker processes, defaults to 1
+        :param seed: the seed, defaults to None
         :return: the list of trajectories
         """
-        for _ in range(number):
-            self.visualizable_trajectory = []
-            self.simulate()
-            self.trajectories.append(self.visualizable_trajectory)
+        self.trajectories.extend(self.iter_trajectories(number, workers, seed))
+        if self.trajectories:
+            self.visualizable_trajectory = self.trajectories[-1]
         return self.trajectories
+
+    def save_trajectories(self, path: str, number: int = 1, workers: int = 1, seed=None) -> int:
+        """
+        Simulate given numbers of trajectories and stream them to a binary sink, see TrajectoryWriter. The sink
+        keeps the state ids of the mdp; read it with read_trajectories.
+
+        :param path: the path of the sink, without extension
+        :param number: the number of trajectory, defaults to 1
+        :param workers: the number of worker processes, defaults to 1
+        :param seed: the seed, defaults to None
+        :return: the number of trajectories in the sink
+        """
+        return self.batch_simulator(seed).save(path, number, workers=workers)
@@ -0,0 +1,254 @@
+import numpy as np
+from tabulate import tabulate
+
+from mdp.mdp import MDP
+from simulation.batch_simulator import BatchSimulator
+from simulation.trajectories import Trajectories
+from wdfa.compact import CompactWDFA
+
+# the size of the first chunk of trajectories, small so that a sequential test may stop early
+FIRST_CHUNK = 64
+
+
+def okamoto_samples(epsilon: float, delta: float) -> int:
+    """
+    Return the number of samples after which the Okamoto (Chernoff-Hoeffding) bound guarantees that the empirical
+    probability is within epsilon of the true probability with a confidence of 1 - delta
+
+    :param epsilon: the half-width of the confidence interval
+    :param delta: the probability of an error
+    :return: the number of samples
+    """
+    return int(np.ceil(np.log(2 / delta) / (2 * epsilon ** 2)))
+
+
+class SMCResult(object):
+    """
+    The result of statistical model checking: for every automaton, the number of satisfying trajectories among the
+    sampled ones, and either the confidence interval of the probability of satisfaction (estimate) or the decision of
+    the sequential test of a threshold (test).
+    """
+
+    def __init__(
+        self,
+        method: str,
+        names: list,
+        successes: np.ndarray,
+        samples: np.ndarray,
+        lower: np.ndarray = None,
+        upper: np.ndarray = None,
+        decision: list = None,
+    ) -> None:
+        """
+        Initialization
+
+        :param method: the name of the method, "okamoto" or "sprt"
+        :param names: the names of the automata
+        :param successes: the number of satisfying trajectories of every automaton
+        :param samples: the number of trajectories used for every automaton
+        :param lower: the lower bounds of the probabilities, defaults to None
+        :param upper: the upper bounds of the probabilities, defaults to None
+        :param decision: whether the probability of every automaton is at least the threshold, None if undecided,
+            defaults to None
+        """
+        self.method = method
+        self.names = names
+        self.successes = successes
+        self.samples = samples
+        self.lower = lower
+        self.upper = upper
+        self.decision = decision
+
+    @property
+    def estimate(self) -> np.ndarray:
+        """
+        The empirical probability of satisfaction of every automaton
+        """
+        return self.successes / np.maximum(self.samples, 1)
+
+    def __str__(self, fmt="presto"):
+        headers = ["automaton", "estimate", "samples"]
+        columns = [self.names, self.estimate.tolist(), self.samples.tolist()]
+        if self.lower is not None:
+            headers += ["lower", "upper"]
+            columns += [self.lower.tolist(), self.upper.tolist()]
+        if self.decision is not None:
+            headers.append("decision")
+            columns.append(self.decision)
+        return tabulate(list(zip(*columns)), headers=headers, tablefmt=fmt)
+
+
+class StatisticalModelChecker(object):
+    """
+    Estimate the probabilities that a policy satisfies automata, e.g., the components of an ordered_or specification,
+    from simulated trajectories instead of an exact solve. The trajectories are sampled by the batch simulator in
+    chunks of FIRST_CHUNK trajectories, doubling up to CHUNK_SIZE, and every automaton is run over the labels of all
+    the trajectories of a chunk in lockstep. A trajectory satisfies an automaton if the run is in a final state when
+    the trajectory ends, i.e., when it stops with aT, in an obstacle or at the target, or after max_steps.
+    """
+
+    def __init__(
+        self,
+        mdp: MDP,
+        policy: dict,
+        automata: list,
+        target=None,
+        seed=None,
+        workers: int = 1,
+        max_samples: int = 10 ** 6,
+        max_steps: int = None,
+    ) -> None:
+        """
+        Initialization
+
+        :param mdp: MDP or product mdp
+        :param policy: the policy
+        :param automata: the WDFAs or CompactWDFAs
+        :param target: the target of the MDP, defaults to None
+        :param seed: the seed, defaults to None
+        :param workers: the number of worker processes, defaults to 1
+        :param max_samples: the maximal number of trajectories, defaults to 10 ** 6
+        :param max_steps: the horizon of the trajectories, defaults to None for no limit
+        """
+        self.simulator = BatchSimulator(mdp, policy, target, seed=seed)
+        self.workers = workers
+        self.max_samples = max_samples
+        self.max_steps = max_steps
+        self.automata = [
+            automaton if isinstance(automaton, CompactWDFA) else CompactWDFA.from_wdfa(automaton)
+            for automaton in automata
+        ]
+        self.names = [
+            automaton.name if automaton.name else str(k) for k, automaton in enumerate(self.automata)
+        ]
+
+        # the base state id of every state id, and the automaton tables over the labels of the base states
+        if hasattr(mdp, "_wdfa"):
+            base_mdp = mdp._mdp
+            self.base_ids, _ = mdp.states.split(np.arange(len(mdp.states)))
+        else:
+            base_mdp = mdp
+            self.base_ids = np.arange(len(mdp.states))
+        self.sink = base_mdp.states.index("sT")
+        bits = base_mdp.proposition_bits()
+        masks = base_mdp.label_masks(bits)
+        self.tables = [automaton.label_table(masks, bits) for automaton in self.automata]
+
+    def satisfied(self, trajectories: Trajectories) -> np.ndarray:
+        """
+        Run the automata over the trajectories, skipping sT
+
+        :param trajectories: the trajectories
+        :return: the boolean matrix of shape (number of automata, number of trajectories)
+        """
+        base = self.base_ids[trajectories.states]
+        lengths = trajectories.lengths
+        runs = np.asarray(
+            [np.full(len(trajectories), automaton.initial_id) for automaton in self.automata],
+            dtype=np.int64,
+        ).reshape(len(self.automata), len(trajectories))
+        for t in range(lengths.max(initial=0)):
+            alive = np.flatnonzero(lengths > t)
+            b = base[trajectories.offsets[alive] + t]
+            alive, b = alive[b != self.sink], b[b != self.sink]
+            for run, (labels, delta) in zip(runs, self.tables):
+                run[alive] = delta[run[alive], labels[b]]
+        return np.asarray(
+            [automaton.final[run] for automaton, run in zip(self.automata, runs)], dtype=bool
+        ).reshape(len(self.automata), len(trajectories))
+
+    def iter_satisfied(self, number: int = None):
+        """
+        Sample the trajectories chunk by chunk
+
+        :param number: the number of trajectories, defaults to max_samples
+        :return: the iterator of the boolean matrices of satisfaction of the chunks
+        """
+        chunks = self.simulator.iter_chunks(
+            self.max_samples if number is None else number,
+            self.max_steps,
+            self.workers,
+            first=FIRST_CHUNK,
+        )
+        for chunk in chunks:
+            yield self.satisfied(chunk)
+
+    def estimate(self, epsilon: float = 0.01, delta: float = 0.05) -> SMCResult:
+        """
+        Estimate the probabilities of satisfaction within epsilon with a confidence of 1 - delta for every
+        automaton. The number of trajectories is fixed in advance by the Okamoto bound, see okamoto_samples.
+
+        :param epsilon: the half-width of the confidence intervals, defaults to 0.01
+        :param delta: the probability of an error of every interval, defaults to 0.05
+        :return: the result
+        """
+        number = okamoto_samples(epsilon, delta)
+        if number > self.max_samples:
+            raise ValueError(
+                "The precision needs {} samples, more than max_samples = {}".format(
+                    number, self.max_samples
+                )
+            )
+        successes = np.zeros(len(self.automata), dtype=np.int64)
+        samples = 0
+        for satisfied in self.iter_satisfied(number):
+            successes += satisfied.sum(axis=1)
+            samples += satisfied.shape[1]
+
+        estimate = successes / samples
+        return SMCResult(
+            method="okamoto",
+            names=self.names,
+            successes=successes,
+            samples=np.full(len(self.automata), samples),
+            lower=np.maximum(estimate - epsilon, 0),
+            upper=np.minimum(estimate + epsilon, 1),
+        )
+
+    def test(
+        self, theta: float, indifference: float = 0.01, alpha: float = 0.05, beta: float = 0.05
+    ) -> SMCResult:
+        """
+        Decide for every automaton whether its probability of satisfaction is at least theta, by Wald's sequential
+        probability ratio test of p >= theta + indifference against p <= theta - indifference. Every automaton
+        stops at the first trajectory where its test decides.
+
+        :param theta: the threshold
+        :param indifference: the half-width of the indifference region, defaults to 0.01
+        :param alpha: the probability of deciding p < theta when p >= theta + indifference, defaults to 0.05
+        :param beta: the probability of deciding p >= theta when p <= theta - indifference, defaults to 0.05
+        :return: the result
+        """
+        p0 = min(theta + indifference, 1 - 1e-12)
+        p1 = max(theta - indifference, 1e-12)
+        accept_low, accept_high = np.log((1 - beta) / alpha), np.log(beta / (1 - alpha))
+        # the log likelihood ratio of p1 against p0 of a satisfying and of a violating trajectory
+        step = np.log([(1 - p1) / (1 - p0), p1 / p0])
+
+        num_automata = len(self.automata)
+        ratio = np.zeros(num_automata)
+        successes = np.zeros(num_automata, dtype=np.int64)
+        samples = np.zeros(num_automata, dtype=np.int64)
+        decision = [None] * num_automata
+        for satisfied in self.iter_satisfied():
+            for k in range(num_automata):
+                if decision[k] is not None:
+                    continue
+                cumulative = ratio[k] + np.cumsum(step[satisfied[k].astype(int)])
+                stops = np.flatnonzero((cumulative >= accept_low) | (cumulative <= accept_high))
+                n = stops[0] + 1 if stops.size else len(cumulative)
+                successes[k] += satisfied[k, :n].sum()
+                samples[k] += n
+                ratio[k] = cumulative[n - 1]
+                if stops.size:
+                    decision[k] = bool(ratio[k] <= accept_high)
+            if all(d is not None for d in decision):
+                break
+
+        return SMCResult(
+            method="sprt",
+            names=self.names,
+            successes=successes,
+            samples=samples,
+            decision=decision,
+        )
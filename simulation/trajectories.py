@@ -0,0 +1,178 @@
+import os
+from ast import literal_eval
+
+import numpy as np
+
+from mdp.state_space import StateSpace
+
+
+class Trajectories(object):
+    """
+    A batch of trajectories in ragged form: the state ids of all the trajectories concatenated in one array, and the
+    offsets of the trajectories, so that the k-th trajectory is states[offsets[k] : offsets[k + 1]].
+    """
+
+    def __init__(self, states, offsets, state_space, finished=None) -> None:
+        """
+        Initialization
+
+        :param states: the concatenated state ids
+        :param offsets: the offsets of the trajectories, of length the number of trajectories + 1
+        :param state_space: the state space of the state ids
+        :param finished: the mask of the trajectories which reached a terminal state, defaults to all of them
+        """
+        self.states = np.asarray(states, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.state_space = state_space
+        self.finished = (
+            np.ones(len(self), dtype=bool) if finished is None else np.asarray(finished, dtype=bool)
+        )
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """
+        The number of states of every trajectory
+        """
+        return np.diff(self.offsets)
+
+    @property
+    def last_states(self) -> np.ndarray:
+        """
+        The id of the last state of every trajectory
+        """
+        return self.states[self.offsets[1:] - 1]
+
+    def decode(self, k: int) -> list:
+        """
+        Return the states of a trajectory
+
+        :param k: the index of the trajectory
+        :return: the list of states
+        """
+        return self.state_space.decode(self[k])
+
+    def iter_lists(self, project=None):
+        """
+        Iterate over the trajectories as lists of states, without sT, e.g., to be visualized
+
+        :param project: the function projecting a state to the state to be visualized, defaults to the identity
+        :return: the iterator of the lists of states
+        """
+        for k in range(len(self)):
+            states = self.decode(k)
+            if project is not None:
+                states = [project(s) for s in states]
+            yield [s for s in states if s != "sT"]
+
+    def to_lists(self, project=None) -> list:
+        """
+        Return the trajectories as lists of states, without sT, e.g., to be visualized
+
+        :param project: the function projecting a state to the state to be visualized, defaults to the identity
+        :return: the list of trajectories
+        """
+        return list(self.iter_lists(project))
+
+    def export_text(self, path: str, project=None) -> None:
+        """
+        Write the trajectories in the text format of utils.save_trajectories, one trajectory per line
+
+        :param path: the path of the text file
+        :param project: the function projecting a state to the state to be written, defaults to the identity
+        """
+        with open(path, "w") as f:
+            for trajectory in self.iter_lists(project):
+                f.write("[" + ", ".join(str(x) for x in trajectory) + "]\n")
+
+    def __getitem__(self, k: int) -> np.ndarray:
+        return self.states[self.offsets[k] : self.offsets[k + 1]]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+class TrajectoryWriter(object):
+    """
+    An append-only binary sink of trajectories, written chunk by chunk so that the trajectories never need to fit in
+    memory. A sink at path is made of
+     1. path.states: the concatenated state ids, as little-endian int32,
+     2. path.offsets: the offsets of the trajectories in path.states, as little-endian int64, starting with 0,
+     3. path.finished: whether every trajectory reached a terminal state, as uint8,
+     4. path.space: the repr of the states of the ids, one per line.
+    Opening an existing sink appends to it, provided it has the same state space. See read_trajectories.
+    """
+
+    def __init__(self, path: str, state_space) -> None:
+        """
+        Initialization
+
+        :param path: the path of the sink, without extension
+        :param state_space: the state space of the state ids
+        """
+        self.path = path
+        space = "".join(repr(s) + "\n" for s in state_space)
+        if os.path.exists(path + ".offsets"):
+            with open(path + ".space") as f:
+                if f.read() != space:
+                    raise ValueError(
+                        "The sink {} was written over another state space".format(path)
+                    )
+        else:
+            with open(path + ".space", "w") as f:
+                f.write(space)
+            np.zeros(1, dtype="<i8").tofile(path + ".offsets")
+            open(path + ".states", "wb").close()
+            open(path + ".finished", "wb").close()
+
+        offsets = np.memmap(path + ".offsets", dtype="<i8", mode="r")
+        self.size, self.count = int(offsets[-1]), len(offsets) - 1
+        del offsets
+        self._states = open(path + ".states", "ab")
+        self._offsets = open(path + ".offsets", "ab")
+        self._finished = open(path + ".finished", "ab")
+
+    def write(self, trajectories: Trajectories) -> None:
+        """
+        Append a chunk of trajectories
+
+        :param trajectories: the trajectories
+        """
+        self._states.write(trajectories.states.astype("<i4").tobytes())
+        self._offsets.write((trajectories.offsets[1:] + self.size).astype("<i8").tobytes())
+        self._finished.write(trajectories.finished.astype(np.uint8).tobytes())
+        self.size += int(trajectories.offsets[-1])
+        self.count += len(trajectories)
+
+    def close(self) -> None:
+        """
+        Flush and close the files
+        """
+        for f in (self._states, self._offsets, self._finished):
+            f.close()
+
+    def __enter__(self) -> "TrajectoryWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def read_trajectories(path: str) -> Trajectories:
+    """
+    Read the trajectories of a sink written by TrajectoryWriter. The state ids and the offsets are memory-mapped, so
+    only the trajectories which are accessed are read.
+
+    :param path: the path of the sink, without extension
+    :return: the trajectories
+    """
+    with open(path + ".space") as f:
+        state_space = StateSpace(literal_eval(line) for line in f)
+    offsets = np.memmap(path + ".offsets", dtype="<i8", mode="r")
+    # a memory map cannot be empty
+    states = (
+        np.memmap(path + ".states", dtype="<i4", mode="r")
+        if offsets[-1] > 0
+        else np.zeros(0, dtype=np.int32)
+    )
+    finished = np.fromfile(path + ".finished", dtype=np.uint8).astype(bool)
+    return Trajectories(states, offsets, state_space, finished)
@@ -1,10 +1,11 @@
+import numpy as np
 from mdp.mdp import MDP
 from mip import Model, minimize, xsum, OptimizationStatus
 from collections import defaultdict
 import pandas as pd
 from itertools import product
 from wdfa.helpers import check_dir, get_save_path
-from solver.lp_solver import LPSolver
+from solver.lp_solver import LPSolver, constraint_matrix
 import ast
 from utils import read_policy
 
@@ -41,14 +42,18 @@ class LPEvaluator(LPSolver):
             xsum(c[i] * self.v[i] for i, _ in enumerate(self.mdp.states))
         )
 
-        for (i, state) in enumerate(self.mdp.states):
-            self.m += self.v[i] >= self.mdp.reward[
-                state, self.policy[state]
-            ] + self.mdp.gamma * xsum(
-                self.mdp.transitions[state][self.policy[state]][next_state] * self.v[j]
-                for j, next_state in enumerate(self.mdp.states)
-                if next_state in self.mdp.transitions[state][self.policy[state]]
-            )
+        num_actions = len(self.mdp.actions)
+        rows = np.fromiter(
+            (
+                i * num_actions + self.mdp.actions.index(self.policy[state])
+                for i, state in enumerate(self.mdp.states)
+            ),
+            dtype=np.int64,
+            count=len(self.mdp.states),
+        )
+        self.add_constraints(
+            constraint_matrix(self.mdp)[rows], self.mdp.reward_vector()[rows]
+        )
 
         # start solving the minimization problem
         self.m.max_gap = 1e-4
@@ -1,14 +1,58 @@
-from mip import Model, minimize, xsum, OptimizationStatus
-from itertools import product
-from collections import defaultdict
-from wdfa.helpers import check_dir, get_save_path
+import ctypes
+import os
+import sys
+from contextlib import contextmanager
+
+from mip import LinExpr, Model, minimize, xsum, OptimizationStatus
 import numpy as np
-from tabulate import tabulate
-import pandas as pd
+from scipy.optimize import linprog
+from scipy.sparse import csr_matrix, identity, kron
 from mdp.mdp import MDP
+from solver.solver import Solver
+
+
+def constraint_matrix(mdp: MDP) -> csr_matrix:
+    """
+    Return the matrix of the Bellman inequalities v[s] - gamma * sum_ns P(ns | s, a) v[ns] >= r(s, a)
+
+    :param mdp: the mdp
+    :return: the (|S| * |A|) x |S| matrix with one row per (state, action) and columns only for its support
+    """
+    num_states, num_actions = len(mdp.states), len(mdp.actions)
+    selector = kron(identity(num_states), np.ones((num_actions, 1)), format="csr")
+    return (selector - mdp.gamma * mdp.transition_matrix).tocsr()
+
+
+try:
+    # the C runtime, to flush the output buffered by CBC
+    _libc = ctypes.CDLL(None)
+except (OSError, TypeError):
+    _libc = None
+
 
+@contextmanager
+def silenced_stdout():
+    """
+    Redirect the file descriptor of the standard output to os.devnull, which silences the C libraries as well,
+    e.g., Clp within CBC, whose output ignores the log level of CBC
+    """
+    sys.stdout.flush()
+    if _libc is not None:
+        _libc.fflush(None)
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(devnull, 1)
+        yield
+    finally:
+        if _libc is not None:
+            _libc.fflush(None)
+        os.dup2(saved, 1)
+        os.close(devnull)
+        os.close(saved)
 
-class LPSolver(object):
+
+class LPSolver(Solver):
     def __init__(
         self,
         mdp: MDP,
@@ -16,63 +60,119 @@ class LPSolver(object):
         max_seconds: float = 300,
         path: str = None,
         disp: bool = False,
+        backend: str = "cbc",
+        verbose: bool = True,
     ):
-        self.mdp = mdp
+        """
+        Initialization
+
+        :param mdp: the mdp to solve
+        :param max_gap: the maximal gap of CBC, defaults to 1e-4
+        :param max_seconds: the time limit of the solver, defaults to 300
+        :param path: the directory to save the policy and value, defaults to None
+        :param disp: whether to print the policy and value, defaults to False
+        :param backend: "cbc" for python-mip with CBC, "highs" for HiGHS through scipy.optimize.linprog,
+            defaults to "cbc"
+        :param verbose: whether to print the progress of the solver and of CBC, defaults to True
+        """
+        super(LPSolver, self).__init__(
+            mdp=mdp, path=path, disp=disp, verbose=verbose
+        )
+        if backend not in ("cbc", "highs"):
+            raise ValueError("Unknown LP backend: {}".format(backend))
+        self.backend = backend
         self.max_gap = max_gap
         self.max_seconds = max_seconds
 
-        self.m = Model()
-        self.v = [self.m.add_var(lb=0) for _ in self.mdp.states]
-
-        self.policy = defaultdict(int)
-        self.value = defaultdict(float)
+        if self.backend == "cbc":
+            self.m = Model()
+            self.m.verbose = int(verbose)
+            self.v = [self.m.add_var(lb=0) for _ in self.mdp.states]
 
-        self.path = path
-        self.disp = disp
+        self.result = None
 
     def state_relevance_weights(self):
         return [1 / len(self.mdp.states)] * len(self.mdp.states)
 
+    def add_constraints(self, matrix: csr_matrix, rhs: np.ndarray) -> None:
+        """
+        Add the constraints matrix @ v >= rhs to the CBC model, one row at a time from the sparse structure
+
+        :param matrix: the constraint matrix
+        :param rhs: the right-hand side
+        """
+        indptr, indices, data = matrix.indptr, matrix.indices, matrix.data.tolist()
+        for row, r in enumerate(rhs.tolist()):
+            start, end = indptr[row], indptr[row + 1]
+            self.m.add_constr(
+                LinExpr(
+                    [self.v[j] for j in indices[start:end]],
+                    data[start:end],
+                    const=-r,
+                    sense=">",
+                )
+            )
+
     def solve(self):
-        c = self.state_relevance_weights()
+        with self.timed("build"):
+            c = self.state_relevance_weights()
+            matrix, rhs = constraint_matrix(self.mdp), self.mdp.reward_vector()
 
-        # objective function: minimize the weighted values
-        self.m.objective = minimize(
-            xsum(c[i] * self.v[i] for i, _ in enumerate(self.mdp.states))
-        )
+        if self.backend == "highs":
+            # the inequalities are negated into the form A_ub @ v <= b_ub
+            with self.timed("solve"):
+                self.result = linprog(
+                    c,
+                    A_ub=-matrix,
+                    b_ub=-rhs,
+                    bounds=(0, None),
+                    method="highs",
+                    options={"time_limit": self.max_seconds},
+                )
+            self.status = "optimal" if self.result.status == 0 else self.result.message
+            self.iterations = self.result.nit
+            self.print_highs_results()
+            return
 
-        for (i, state), action in product(enumerate(self.mdp.states), self.mdp.actions):
-            self.m += self.v[i] >= self.mdp.reward[
-                state, action
-            ] + self.mdp.gamma * xsum(
-                self.mdp.transitions[state][action][next_state] * self.v[j]
-                for j, next_state in enumerate(self.mdp.states)
-                if next_state in self.mdp.transitions[state][action]
+        with self.timed("build"):
+            # objective function: minimize the weighted values
+            self.m.objective = minimize(
+                xsum(c[i] * self.v[i] for i, _ in enumerate(self.mdp.states))
             )
 
+            self.add_constraints(matrix, rhs)
+
         # start solving the minimization problem
         self.m.max_gap = 1e-4
-        status = self.m.optimize(max_seconds=self.max_seconds)
+        with self.timed("solve"):
+            if self.verbose:
+                status = self.m.optimize(max_seconds=self.max_seconds)
+            else:
+                with silenced_stdout():
+                    status = self.m.optimize(max_seconds=self.max_seconds)
+        self.status = status.name.lower()
         self.print_results(status)
 
-    @staticmethod
-    def pprint(res, name, fmt="presto") -> None:
-        data = []
-        for k, v in res.items():
-            data.append([k, v])
-        print(tabulate(data, headers=["state", name], tablefmt=fmt))
+    def print_highs_results(self):
+        if self.result.status == 0:
+            self.log("optimal solution cost {} found".format(self.result.fun))
+            self.log("Extracting the policy...")
+            self.extract_policy()
+            self.report()
+        else:
+            self.log("no optimal solution found: {}".format(self.result.message))
 
     def print_results(self, status):
         if status == OptimizationStatus.OPTIMAL:
             ("optimal solution cost {} found".format(self.m.objective_value))
         elif status == OptimizationStatus.FEASIBLE:
-            print(
+            self.log(
                 "sol.cost {} found, best possible: {}".format(
                     self.m.objective_value, self.m.objective_bound
                 )
             )
         elif status == OptimizationStatus.NO_SOLUTION_FOUND:
-            print(
+            self.log(
                 "no feasible solution found, lower bound is: {}".format(
                     self.m.objective_bound
                 )
@@ -81,43 +181,21 @@ class LPSolver(object):
             status == OptimizationStatus.OPTIMAL
             or status == OptimizationStatus.FEASIBLE
         ):
-            print("Extracting the policy...")
+            self.log("Extracting the policy...")
             self.extract_policy()
-            if self.disp:
-                self.pprint(self.policy, "action")
-                self.pprint(self.value, "value")
-            if self.path:
-                check_dir(self.path)
-                self.save_policy_and_value()
-
-    def save_policy_and_value(self) -> None:
+            self.report()
+
+    def solution(self) -> np.ndarray:
         """
-        Save the policy and value
+        Return the solution of the LP, the value of every state id
         """
-        for var in (self.policy, self.value):
-            df = pd.DataFrame(
-                var.items(),
-                columns=["State", "Value" if var is self.value else "Action"],
-            )
-            df.to_csv(
-                get_save_path(self.path, "value" if var is self.value else "policy"),
-                sep="\t",
-            )
+        if self.backend == "highs":
+            return self.result.x
+        return np.asarray([var.x for var in self.v])
 
     def extract_policy(self):
-        for _, state in enumerate(self.mdp.states):
-            q = [
-                self.mdp.reward[state, action]
-                + self.mdp.gamma
-                * sum(
-                    [
-                        self.mdp.transitions[state][action][next_state] * self.v[j].x
-                        for j, next_state in enumerate(self.mdp.states)
-                        if next_state in self.mdp.transitions[state][action]
-                    ]
-                )
-                for action in self.mdp.actions
-            ]
-            opt_a = self.mdp.actions[np.argmax(q)]
-            self.policy[state] = opt_a
-            self.value[state] = np.max(q)
+        with self.timed("extract"):
+            q = self.q_values(self.solution())
+            self.policy_vector = q.argmax(axis=1)
+            self.value_vector = q.max(axis=1)
+            self.set_policy_and_value(self.policy_vector, self.value_vector)
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, identity
+from scipy.sparse.linalg import LinearOperator, bicgstab, spilu, spsolve
+
+from mdp.mdp import MDP
+from solver.solver import Solver
+from utils import read_policy
+from wdfa.helpers import check_dir, get_save_path
+
+
+def policy_matrix(
+    transition_matrix: csr_matrix, policy_vector: np.ndarray, num_actions: int
+) -> csr_matrix:
+    """
+    Return the transition matrix of the Markov chain induced by a policy
+
+    :param transition_matrix: the (|S| * |A|) x |S| transition matrix
+    :param policy_vector: the action id of every state id
+    :param num_actions: the number of actions
+    :return: the |S| x |S| transition matrix of the policy
+    """
+    return transition_matrix[np.arange(len(policy_vector)) * num_actions + policy_vector]
+
+
+def iterative_evaluation(
+    matrix: csr_matrix,
+    reward: np.ndarray,
+    gamma: float,
+    value_vector: np.ndarray = None,
+    tol: float = 1e-10,
+    max_iter: int = None,
+) -> np.ndarray:
+    """
+    Evaluate a policy by the fixed-point iteration v = r + gamma * P v
+
+    :param matrix: the transition matrix of the policy
+    :param reward: the reward of the policy
+    :param gamma: the discount factor
+    :param value_vector: the initial values, defaults to zeros
+    :param tol: the maximal change of the values at convergence, defaults to 1e-10
+    :param max_iter: the number of iterations if given, otherwise iterate until convergence
+    :return: the values
+    """
+    if value_vector is None:
+        value_vector = np.zeros(matrix.shape[0])
+    iteration = 0
+    while max_iter is None or iteration < max_iter:
+        new_value_vector = reward + gamma * (matrix @ value_vector)
+        iteration += 1
+        change = np.abs(new_value_vector - value_vector).max(initial=0)
+        value_vector = new_value_vector
+        if max_iter is None and change < tol:
+            break
+    return value_vector
+
+
+def evaluate_policy(
+    matrix: csr_matrix,
+    reward: np.ndarray,
+    gamma: float,
+    method: str = "auto",
+    direct_max_size: int = 200000,
+    tol: float = 1e-10,
+) -> np.ndarray:
+    """
+    Evaluate a policy by solving the linear system (I - gamma * P) v = r
+
+    :param matrix: the transition matrix of the policy
+    :param reward: the reward of the policy
+    :param gamma: the discount factor
+    :param method: "direct" for a sparse LU solve, "iterative" for BiCGSTAB preconditioned by an incomplete LU,
+        "auto" to choose by the size of the system, defaults to "auto"
+    :param direct_max_size: the largest system solved directly with "auto", defaults to 200000
+    :param tol: the tolerance of the iterative solvers, defaults to 1e-10
+    :return: the values
+    """
+    size = matrix.shape[0]
+    system = (identity(size, format="csc") - gamma * matrix).tocsc()
+    if method == "auto":
+        method = "direct" if size <= direct_max_size else "iterative"
+
+    if method == "direct":
+        value_vector = spsolve(system, reward)
+        if np.all(np.isfinite(value_vector)):
+            return value_vector
+    elif method == "iterative":
+        try:
+            ilu = spilu(system, drop_tol=1e-5)
+            preconditioner = LinearOperator(system.shape, ilu.solve)
+        except RuntimeError:
+            preconditioner = None
+        value_vector, info = bicgstab(system, reward, rtol=tol, M=preconditioner)
+        if info == 0 and np.all(np.isfinite(value_vector)):
+            return value_vector
+    else:
+        raise ValueError("Unknown evaluation method: {}".format(method))
+
+    # fall back to the fixed-point iteration, which only needs matrix-vector products
+    return iterative_evaluation(matrix, reward, gamma, tol=tol)
+
+
+class PolicyEvaluator(Solver):
+    """
+    Evaluate a fixed policy by a sparse linear solve. Unlike LPEvaluator, the value is the value of the policy
+    itself and the policy is kept unchanged.
+    """
+
+    def __init__(
+        self,
+        mdp: MDP,
+        policy_path: str = None,
+        method: str = "auto",
+        path: str = None,
+        disp: bool = False,
+        verbose: bool = True,
+    ) -> None:
+        """
+        Initialization
+
+        :param mdp: the mdp
+        :param policy_path: the path of the policy to evaluate, defaults to None
+        :param method: the method of evaluate_policy, defaults to "auto"
+        :param path: the directory to save the value, defaults to None
+        :param disp: whether to print the value, defaults to False
+        :param verbose: whether to print the progress of the solver, defaults to True
+        """
+        super(PolicyEvaluator, self).__init__(
+            mdp=mdp, path=path, disp=disp, verbose=verbose
+        )
+        self.method = method
+        if policy_path:
+            self.policy = read_policy(policy_path)
+
+    def set_policy(self, policy: dict) -> None:
+        """
+        Set the policy of the PolicyEvaluator
+
+        :param policy: the policy
+        """
+        self.policy = policy
+
+    def encode_policy(self) -> np.ndarray:
+        """
+        Return the action id of every state id under the policy
+        """
+        return np.fromiter(
+            (self.mdp.actions.index(self.policy[s]) for s in self.mdp.states),
+            dtype=np.int64,
+            count=len(self.mdp.states),
+        )
+
+    def evaluate(self) -> None:
+        num_actions = len(self.mdp.actions)
+        self.policy_vector = self.encode_policy()
+        rows = np.arange(len(self.policy_vector)) * num_actions + self.policy_vector
+
+        with self.timed("evaluate"):
+            self.value_vector = evaluate_policy(
+                policy_matrix(self.mdp.transition_matrix, self.policy_vector, num_actions),
+                self.mdp.reward_vector()[rows],
+                self.mdp.gamma,
+                method=self.method,
+            )
+        for s, v in zip(self.mdp.states, self.value_vector.tolist()):
+            self.value[s] = v
+
+        if self.disp:
+            self.pprint(self.value, "value")
+        if self.path:
+            check_dir(self.path)
+            self.save_value()
+
+    def save_value(self) -> None:
+        """
+        Save the value
+        """
+        df = pd.DataFrame(self.value.items(), columns=["State", "Value"])
+        df.to_csv(
+            get_save_path(
+                self.path,
+                "{}_evaluation".format(
+                    self.mdp._wdfa.name if hasattr(self.mdp._wdfa, "name") else None
+                ),
+            ).replace("|", " mid "),
+            sep="\t",
+        )
@@ -0,0 +1,213 @@
+import numpy as np
+
+from mdp.mdp import MDP
+from solver.policy_evaluator import evaluate_policy, iterative_evaluation, policy_matrix
+from solver.solver import Solver
+from solver.value_iteration import ValueIterationSolver
+
+
+class PolicyIterationSolver(Solver):
+    """
+    Policy iteration: alternate the sparse evaluation of the current policy with the greedy improvement of all the
+    states at once, until the policy is stable. The initial policy is greedy on the values of a coarse value
+    iteration: starting from the greedy policy on the rewards, the number of improvements grows with the distance
+    from the rewards, e.g., over a hundred on a 100 x 100 grid. The sweeps and the time of this warm start are
+    reported apart from the improvements, see warm_start_iterations.
+    """
+
+    def __init__(
+        self,
+        mdp: MDP,
+        max_iter: int = 1000,
+        method: str = "auto",
+        warm_start_tol: float = 1e-2,
+        path: str = None,
+        disp: bool = False,
+        verbose: bool = True,
+    ) -> None:
+        """
+        Initialization
+
+        :param mdp: the mdp to solve
+        :param max_iter: the maximal number of improvements, defaults to 1000
+        :param method: the method of evaluate_policy, defaults to "auto"
+        :param warm_start_tol: the tolerance of the value iteration of the initial policy, defaults to 1e-2, None to
+            start from the greedy policy on the rewards
+        :param path: the directory to save the policy and value, defaults to None
+        :param disp: whether to print the policy and value, defaults to False
+        :param verbose: whether to print the progress of the solver, defaults to True
+        """
+        super(PolicyIterationSolver, self).__init__(
+            mdp=mdp, path=path, disp=disp, verbose=verbose
+        )
+        self.max_iter = max_iter
+        self.method = method
+        self.warm_start_tol = warm_start_tol
+
+        self.iterations = 0
+        # the number of sweeps of the value iteration of the warm start
+        self.warm_start_iterations = 0
+        self.converged = False
+
+    def evaluate(
+        self, policy_vector: np.ndarray, reward_vector: np.ndarray, value_vector: np.ndarray
+    ) -> np.ndarray:
+        """
+        Evaluate the policy
+
+        :param policy_vector: the action id of every state id
+        :param reward_vector: the reward of every state-action row
+        :param value_vector: the values of the previous policy
+        :return: the values of the policy
+        """
+        num_actions = len(self.mdp.actions)
+        rows = np.arange(len(policy_vector)) * num_actions + policy_vector
+        return evaluate_policy(
+            policy_matrix(self.mdp.transition_matrix, policy_vector, num_actions),
+            reward_vector[rows],
+            self.mdp.gamma,
+            method=self.method,
+        )
+
+    @staticmethod
+    def improve(q: np.ndarray, policy_vector: np.ndarray) -> np.ndarray:
+        """
+        Return the greedy policy, keeping the current action of a state unless another action is strictly better
+
+        :param q: the |S| x |A| matrix of Q-values
+        :param policy_vector: the current action id of every state id
+        :return: the improved action id of every state id
+        """
+        current = q[np.arange(len(policy_vector)), policy_vector]
+        best = q.max(axis=1)
+        better = best > current + 1e-12 * np.maximum(1, np.abs(best))
+        return np.where(better, q.argmax(axis=1), policy_vector)
+
+    def is_stable(
+        self, old_policy_vector: np.ndarray, policy_vector: np.ndarray, q: np.ndarray, value_vector: np.ndarray
+    ) -> bool:
+        """
+        Return whether to stop after an improvement
+
+        :param old_policy_vector: the policy before the improvement
+        :param policy_vector: the policy after the improvement
+        :param q: the Q-values of the values of the old policy
+        :param value_vector: the values of the old policy
+        :return: whether the policy is stable
+        """
+        return np.array_equal(old_policy_vector, policy_vector)
+
+    def warm_start(self, reward_vector: np.ndarray) -> np.ndarray:
+        """
+        Return the values of a value iteration within warm_start_tol, or zeros without a warm start. The sweeps are
+        counted in warm_start_iterations.
+
+        :param reward_vector: the reward of every state-action row
+        :return: the value of every state id
+        """
+        if self.warm_start_tol is None:
+            return np.zeros(len(self.mdp.states))
+        solver = ValueIterationSolver(
+            self.mdp, tol=self.warm_start_tol, verbose=False, precompute=False
+        )
+        states, value_vector = solver.initial_values()
+        solver.iterate_states(states, value_vector, reward_vector)
+        self.warm_start_iterations = solver.iterations
+        return value_vector
+
+    def solve(self) -> None:
+        reward_vector = self.mdp.reward_vector()
+        self.iterations = 0
+        self.warm_start_iterations = 0
+        self.converged = False
+        # the initial policy is greedy on the values of the warm start
+        with self.timed("warm_start"):
+            value_vector = self.warm_start(reward_vector)
+            q = self.q_values(value_vector, reward_vector)
+            policy_vector = q.argmax(axis=1)
+
+        while self.iterations < self.max_iter:
+            with self.timed("evaluate"):
+                value_vector = self.evaluate(policy_vector, reward_vector, value_vector)
+            self.iterations += 1
+
+            with self.timed("improve"):
+                q = self.q_values(value_vector, reward_vector)
+                old_policy_vector, policy_vector = policy_vector, self.improve(q, policy_vector)
+            if self.is_stable(old_policy_vector, policy_vector, q, value_vector):
+                self.converged = True
+                break
+        self.status = "converged" if self.converged else "iteration limit"
+        if not self.converged:
+            self.log(
+                "Policy iteration did not converge in {} iterations.".format(self.max_iter)
+            )
+
+        self.policy_vector = policy_vector
+        self.value_vector = q.max(axis=1)
+        with self.timed("extract"):
+            self.set_policy_and_value(self.policy_vector, self.value_vector)
+        self.report()
+
+
+class ModifiedPolicyIterationSolver(PolicyIterationSolver):
+    """
+    Modified policy iteration: the policy is evaluated partially by k Bellman backups of the policy, starting from
+    the values of the previous policy. It stops when the values are within tol of the optimal values.
+    """
+
+    def __init__(
+        self,
+        mdp: MDP,
+        k: int = 20,
+        tol: float = 1e-6,
+        max_iter: int = 100000,
+        warm_start_tol: float = None,
+        path: str = None,
+        disp: bool = False,
+        verbose: bool = True,
+    ) -> None:
+        """
+        Initialization
+
+        :param mdp: the mdp to solve
+        :param k: the number of backups of a partial evaluation, defaults to 20
+        :param tol: the maximal error of the values, defaults to 1e-6
+        :param max_iter: the maximal number of improvements, defaults to 100000
+        :param warm_start_tol: the tolerance of the value iteration of the initial policy, defaults to None to start
+            from the greedy policy on the rewards, since the partial evaluations are already value iterations
+        :param path: the directory to save the policy and value, defaults to None
+        :param disp: whether to print the policy and value, defaults to False
+        :param verbose: whether to print the progress of the solver, defaults to True
+        """
+        super(ModifiedPolicyIterationSolver, self).__init__(
+            mdp=mdp,
+            max_iter=max_iter,
+            warm_start_tol=warm_start_tol,
+            path=path,
+            disp=disp,
+            verbose=verbose,
+        )
+        self.k = k
+        self.tol = tol
+
+    def evaluate(
+        self, policy_vector: np.ndarray, reward_vector: np.ndarray, value_vector: np.ndarray
+    ) -> np.ndarray:
+        num_actions = len(self.mdp.actions)
+        rows = np.arange(len(policy_vector)) * num_actions + policy_vector
+        return iterative_evaluation(
+            policy_matrix(self.mdp.transition_matrix, policy_vector, num_actions),
+            reward_vector[rows],
+            self.mdp.gamma,
+            value_vector=value_vector,
+            max_iter=self.k,
+        )
+
+    def is_stable(
+        self, old_policy_vector: np.ndarray, policy_vector: np.ndarray, q: np.ndarray, value_vector: np.ndarray
+    ) -> bool:
+        # the same stopping rule as value iteration, on the Bellman residual of the values
+        gamma = self.mdp.gamma
+        threshold = self.tol * (1 - gamma) / gamma if gamma < 1 else self.tol
+        return np.abs(q.max(axis=1) - value_vector).max(initial=0) < threshold
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+
+from mdp.bisimulation import Bisimulation
+from solver.lp_solver import LPSolver
+from solver.policy_iteration import ModifiedPolicyIterationSolver, PolicyIterationSolver
+from solver.solver import SolveResult
+from solver.topological import TopologicalValueIterationSolver
+from solver.value_iteration import ValueIterationSolver
+
+
+BACKENDS = {}
+
+
+def register_backend(name: str, solver_class: type, **defaults) -> None:
+    """
+    Register a solver under a backend name
+
+    :param name: the name of the backend
+    :param solver_class: the subclass of Solver, constructed with the mdp and the options
+    :param defaults: the options always passed to the solver class
+    """
+    BACKENDS[name] = (solver_class, defaults)
+
+
+def available_backends() -> list:
+    """
+    Return the names of the registered backends
+    """
+    return sorted(BACKENDS)
+
+
+def solve(
+    mdp, backend: str = "cbc", verbose: bool = False, minimize: bool = False, **options
+) -> SolveResult:
+    """
+    Solve the mdp with a registered backend. Nothing is printed or saved unless requested by the options.
+
+    :param mdp: the mdp or product mdp to solve
+    :param backend: the name of the backend, defaults to "cbc"
+    :param verbose: whether to print the progress of the solver, defaults to False
+    :param minimize: whether to solve the bisimulation quotient of the mdp and lift the result, defaults to False
+    :param options: the options of the solver, e.g., tol or max_seconds
+    :return: the result
+    """
+    if backend not in BACKENDS:
+        raise ValueError(
+            "Unknown backend: {}. The available backends are {}.".format(
+                backend, available_backends()
+            )
+        )
+    if minimize:
+        return solve_quotient(mdp, backend, verbose, **options)
+
+    solver_class, defaults = BACKENDS[backend]
+    solver = solver_class(mdp=mdp, verbose=verbose, **dict(defaults, **options))
+    with solver.timed("total"):
+        solver.solve()
+    return solver.get_result(backend)
+
+
+def solve_quotient(mdp, backend: str, verbose: bool = False, **options) -> SolveResult:
+    """
+    Solve the bisimulation quotient of the mdp and lift the value and policy to all the states
+
+    :param mdp: the mdp or product mdp to solve
+    :param backend: the name of the backend
+    :param verbose: whether to print the progress of the solver, defaults to False
+    :param options: the options of the solver
+    :return: the result over the states of the mdp
+    """
+    start = time.perf_counter()
+    bisimulation = Bisimulation(mdp)
+    minimize_time = time.perf_counter() - start
+
+    result = solve(bisimulation.quotient, backend=backend, verbose=verbose, **options)
+    value = bisimulation.lift(result.value) if result.value is not None else None
+    timing = dict(result.timing, minimize=minimize_time)
+    timing["total"] = timing.get("total", 0) + minimize_time
+    return SolveResult(
+        backend=backend,
+        states=mdp.states,
+        actions=mdp.actions,
+        value=value,
+        policy=bisimulation.lift(result.policy) if result.policy is not None else None,
+        status=result.status,
+        objective=float(np.mean(value)) if value is not None else None,
+        timing=timing,
+        iterations=result.iterations,
+        warm_start_iterations=result.warm_start_iterations,
+    )
+
+register_backend("cbc", LPSolver, backend="cbc")
+register_backend("highs", LPSolver, backend="highs")
+register_backend("value_iteration", ValueIterationSolver)
+register_backend("policy_iteration", PolicyIterationSolver)
+register_backend("modified_policy_iteration", ModifiedPolicyIterationSolver)
+register_backend("topological", TopologicalValueIterationSolver)
@@ -0,0 +1,218 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import time
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from mdp.mdp import MDP
+from wdfa.helpers import check_dir, get_save_path
+
+
+class SolveResult(object):
+    """
+    The result of a solver: the value and the policy as arrays over the state ids, the status, the objective (the
+    mean value over the states, i.e., the LP objective with uniform state relevance weights), the wall time of every
+    phase in seconds and the number of iterations, with the sweeps of a warm start apart.
+    """
+
+    def __init__(
+        self,
+        backend: str,
+        states,
+        actions: list,
+        value: np.ndarray,
+        policy: np.ndarray,
+        status: str,
+        objective: float,
+        timing: dict,
+        iterations: int = None,
+        warm_start_iterations: int = None,
+    ) -> None:
+        """
+        Initialization
+
+        :param backend: the name of the backend
+        :param states: the state space, defining the state ids
+        :param actions: the list of actions, defining the action ids
+        :param value: the value of every state id
+        :param policy: the action id of every state id
+        :param status: the status of the solver
+        :param objective: the mean value over the states
+        :param timing: the wall time of every phase
+        :param iterations: the number of iterations, defaults to None
+        :param warm_start_iterations: the number of sweeps of the warm start, e.g., of policy iteration, defaults to
+            None
+        """
+        self.backend = backend
+        self.states = states
+        self.actions = actions
+        self.value = value
+        self.policy = policy
+        self.status = status
+        self.objective = objective
+        self.timing = timing
+        self.iterations = iterations
+        self.warm_start_iterations = warm_start_iterations
+
+    def value_dict(self) -> dict:
+        """
+        Return the value as a dictionary keyed by the states
+        """
+        return dict(zip(self.states, self.value.tolist()))
+
+    def policy_dict(self) -> dict:
+        """
+        Return the policy as a dictionary keyed by the states
+        """
+        return {s: self.actions[k] for s, k in zip(self.states, self.policy.tolist())}
+
+    def __str__(self, fmt="presto"):
+        data = [
+            ["backend", self.backend],
+            ["status", self.status],
+            ["objective", self.objective],
+            ["iterations", self.iterations],
+        ]
+        if self.warm_start_iterations is not None:
+            data.append(["warm start iterations", self.warm_start_iterations])
+        data += [["time: {}".format(k), v] for k, v in self.timing.items()]
+        return tabulate(data, headers=["Variable", "Value"], tablefmt=fmt)
+
+
+class Solver(object):
+    """
+    The base class of the solvers which compute the optimal policy and value of a MDP.
+    The results are kept as dictionaries keyed by the states, policy[s] and value[s].
+    """
+
+    def __init__(
+        self, mdp: MDP, path: str = None, disp: bool = False, verbose: bool = True
+    ) -> None:
+        """
+        Initialization
+
+        :param mdp: the mdp to solve
+        :param path: the directory to save the policy and value, defaults to None
+        :param disp: whether to print the policy and value, defaults to False
+        :param verbose: whether to print the progress of the solver, defaults to True
+        """
+        self.mdp = mdp
+
+        self.policy = defaultdict(int)
+        self.value = defaultdict(float)
+
+        self.path = path
+        self.disp = disp
+        self.verbose = verbose
+
+        self.status = None
+        self.iterations = None
+        self.warm_start_iterations = None
+        self.timing = defaultdict(float)
+        self.value_vector = None
+        self.policy_vector = None
+
+    def log(self, message: str) -> None:
+        """
+        Print the message if the solver is verbose
+
+        :param message: the message
+        """
+        if self.verbose:
+            print(message)
+
+    @contextmanager
+    def timed(self, phase: str):
+        """
+        Add the wall time of the block to the time of the phase
+
+        :param phase: the name of the phase
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing[phase] += time.perf_counter() - start
+
+    def objective(self) -> float:
+        """
+        Return the mean value over the states
+        """
+        return float(np.mean(self.value_vector)) if self.value_vector is not None else None
+
+    def get_result(self, backend: str) -> SolveResult:
+        """
+        Return the result of the last solve
+
+        :param backend: the name of the backend
+        :return: the result
+        """
+        return SolveResult(
+            backend=backend,
+            states=self.mdp.states,
+            actions=self.mdp.actions,
+            value=self.value_vector,
+            policy=self.policy_vector,
+            status=self.status,
+            objective=self.objective(),
+            timing=dict(self.timing),
+            iterations=self.iterations,
+            warm_start_iterations=self.warm_start_iterations,
+        )
+
+    def q_values(self, value_vector: np.ndarray, reward_vector: np.ndarray = None) -> np.ndarray:
+        """
+        Compute the Q-values of all the state-action pairs given the values of the states
+
+        :param value_vector: the value of every state id
+        :param reward_vector: the reward of every state-action row, defaults to the reward of the mdp
+        :return: the |S| x |A| matrix of Q-values
+        """
+        if reward_vector is None:
+            reward_vector = self.mdp.reward_vector()
+        q = reward_vector + self.mdp.gamma * (self.mdp.transition_matrix @ value_vector)
+        return q.reshape(len(self.mdp.states), len(self.mdp.actions))
+
+    def set_policy_and_value(self, policy_vector: np.ndarray, value_vector: np.ndarray) -> None:
+        """
+        Fill the policy and value dictionaries
+
+        :param policy_vector: the action id of every state id
+        :param value_vector: the value of every state id
+        """
+        for s, k, v in zip(self.mdp.states, policy_vector.tolist(), value_vector.tolist()):
+            self.policy[s] = self.mdp.actions[k]
+            self.value[s] = v
+
+    def report(self) -> None:
+        """
+        Print and save the policy and value as requested
+        """
+        if self.disp:
+            self.pprint(self.policy, "action")
+            self.pprint(self.value, "value")
+        if self.path:
+            check_dir(self.path)
+            self.save_policy_and_value()
+
+    @staticmethod
+    def pprint(res, name, fmt="presto") -> None:
+        data = []
+        for k, v in res.items():
+            data.append([k, v])
+        print(tabulate(data, headers=["state", name], tablefmt=fmt))
+
+    def save_policy_and_value(self) -> None:
+        """
+        Save the policy and value
+        """
+        for var in (self.policy, self.value):
+            df = pd.DataFrame(
+                var.items(),
+                columns=["State", "Value" if var is self.value else "Action"],
+            )
+            df.to_csv(
+                get_save_path(self.path, "value" if var is self.value else "policy"),
+                sep="\t",
+            )
@@ -0,0 +1,127 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from mdp.mdp import MDP
+from mdp.qualitative import state_graph
+from solver.value_iteration import ValueIterationSolver
+
+
+def topological_levels(graph: csr_matrix) -> tuple:
+    """
+    Compute the strongly connected components of the graph and order them by levels: the components of level 0 have
+    no successor components, and every successor component of a component of level k has a level lower than k.
+
+    :param graph: the adjacency matrix of the states
+    :return: the component of every state and the level of every component
+    """
+    num_components, labels = connected_components(
+        graph, directed=True, connection="strong"
+    )
+    rows, cols = graph.nonzero()
+    crossing = labels[rows] != labels[cols]
+    condensation = csr_matrix(
+        (
+            np.ones(np.count_nonzero(crossing), dtype=np.int64),
+            (labels[cols[crossing]], labels[rows[crossing]]),
+        ),
+        shape=(num_components, num_components),
+    )
+    condensation.sum_duplicates()
+    # condensation[c, :] are the predecessor components of c; peel the components without unsolved successors
+    out_degree = np.bincount(condensation.indices, minlength=num_components)
+
+    levels = np.full(num_components, -1, dtype=np.int64)
+    frontier = np.flatnonzero(out_degree == 0)
+    level = 0
+    while frontier.size:
+        levels[frontier] = level
+        predecessors = condensation[frontier].indices
+        np.subtract.at(out_degree, predecessors, 1)
+        predecessors = np.unique(predecessors)
+        frontier = predecessors[out_degree[predecessors] == 0]
+        level += 1
+    return labels, levels
+
+
+class TopologicalValueIterationSolver(ValueIterationSolver):
+    """
+    Topological value iteration: the strongly connected components of the states are solved one level at a time,
+    from the components without successors up to the initial state. A level only depends on the final values of
+    the levels below it, so it is iterated to convergence once and never revisited. The product of an mdp with a
+    dfa whose progress is monotone is split along the layers of the dfa.
+    """
+
+    def __init__(
+        self,
+        mdp: MDP,
+        tol: float = 1e-6,
+        max_iter: int = 100000,
+        path: str = None,
+        disp: bool = False,
+        verbose: bool = True,
+        precompute: bool = True,
+    ) -> None:
+        """
+        Initialization
+
+        :param mdp: the mdp to solve
+        :param tol: the maximal error of the values, defaults to 1e-6
+        :param max_iter: the maximal number of sweeps over all the levels, defaults to 100000
+        :param path: the directory to save the policy and value, defaults to None
+        :param disp: whether to print the policy and value, defaults to False
+        :param verbose: whether to print the progress of the solver, defaults to True
+        :param precompute: whether to fix the values known from the qualitative analysis of the mdp, see
+            QualitativeSets, defaults to True
+        """
+        super(TopologicalValueIterationSolver, self).__init__(
+            mdp=mdp,
+            tol=tol,
+            max_iter=max_iter,
+            path=path,
+            disp=disp,
+            verbose=verbose,
+            precompute=precompute,
+        )
+        self.num_components = 0
+        self.num_levels = 0
+
+    def solve(self) -> None:
+        reward_vector = self.mdp.reward_vector()
+        self.iterations = 0
+        self.backups = 0
+        with self.timed("precompute"):
+            maybe, value_vector = self.initial_values()
+
+        with self.timed("decompose"):
+            labels, levels = topological_levels(
+                state_graph(self.mdp.transition_matrix, len(self.mdp.actions))
+            )
+            maybe_levels = levels[labels[maybe]]
+            order = maybe[np.argsort(maybe_levels, kind="stable")]
+            bounds = np.searchsorted(
+                np.sort(maybe_levels), np.arange(levels.max(initial=-1) + 2)
+            )
+        self.num_components = len(levels)
+        self.num_levels = len(bounds) - 1
+
+        self.converged = True
+        with self.timed("solve"):
+            for level in range(self.num_levels):
+                states = order[bounds[level] : bounds[level + 1]]
+                if len(states) and not self.iterate_states(states, value_vector, reward_vector):
+                    self.converged = False
+        self.status = "converged" if self.converged else "iteration limit"
+        if not self.converged:
+            self.log(
+                "Topological value iteration did not converge in {} iterations.".format(
+                    self.max_iter
+                )
+            )
+
+        with self.timed("extract"):
+            q = self.q_values(value_vector, reward_vector)
+            self.policy_vector = q.argmax(axis=1)
+            self.value_vector = q.max(axis=1)
+            self.set_policy_and_value(self.policy_vector, self.value_vector)
+        self.report()
@@ -0,0 +1,128 @@
+import numpy as np
+
+from mdp.mdp import MDP
+from solver.solver import Solver
+
+
+class ValueIterationSolver(Solver):
+    """
+    Value iteration: the Bellman backups of all the states and actions are computed at once as one sparse
+    matrix-vector product with the transition matrix. Only the states whose values are not known from the
+    qualitative analysis are updated.
+    """
+
+    def __init__(
+        self,
+        mdp: MDP,
+        tol: float = 1e-6,
+        max_iter: int = 100000,
+        path: str = None,
+        disp: bool = False,
+        verbose: bool = True,
+        precompute: bool = True,
+    ) -> None:
+        """
+        Initialization
+
+        :param mdp: the mdp to solve
+        :param tol: the maximal error of the values, defaults to 1e-6
+        :param max_iter: the maximal number of sweeps, defaults to 100000
+        :param path: the directory to save the policy and value, defaults to None
+        :param disp: whether to print the policy and value, defaults to False
+        :param verbose: whether to print the progress of the solver, defaults to True
+        :param precompute: whether to fix the values known from the qualitative analysis of the mdp, see
+            QualitativeSets, defaults to True
+        """
+        super(ValueIterationSolver, self).__init__(
+            mdp=mdp, path=path, disp=disp, verbose=verbose
+        )
+        self.tol = tol
+        self.max_iter = max_iter
+        self.precompute = precompute
+
+        self.iterations = 0
+        self.converged = False
+        # the number of Bellman backups of a state
+        self.backups = 0
+
+    def stopping_threshold(self) -> float:
+        """
+        The sup-norm of the change of the values below which the values are within tol of the optimal values
+        """
+        gamma = self.mdp.gamma
+        return self.tol * (1 - gamma) / gamma if gamma < 1 else self.tol
+
+    def iterate_states(
+        self, states: np.ndarray, value_vector: np.ndarray, reward_vector: np.ndarray
+    ) -> bool:
+        """
+        Run the Bellman backups of the given states until convergence or until the iteration cap is reached, in
+        place. The values of the other states are kept fixed.
+
+        :param states: the state ids to update
+        :param value_vector: the value of every state id
+        :param reward_vector: the reward of every state-action row
+        :return: whether the values converged
+        """
+        num_actions = len(self.mdp.actions)
+        rows = (states[:, None] * num_actions + np.arange(num_actions)).ravel()
+        matrix = self.mdp.transition_matrix[rows]
+        gamma = self.mdp.gamma
+
+        # the contribution of the fixed states
+        value_vector[states] = 0
+        constant = reward_vector[rows] + gamma * (matrix @ value_vector)
+        internal = matrix[:, states]
+        if internal.nnz == 0:
+            # no transition stays in the states: a single backup is exact
+            value_vector[states] = constant.reshape(-1, num_actions).max(axis=1)
+            self.backups += len(states)
+            return True
+
+        threshold = self.stopping_threshold()
+        local = np.zeros(len(states))
+        converged = False
+        while self.iterations < self.max_iter:
+            new_local = (constant + gamma * (internal @ local)).reshape(-1, num_actions).max(axis=1)
+            self.iterations += 1
+            self.backups += len(states)
+            change = np.abs(new_local - local).max(initial=0)
+            local = new_local
+            if change < threshold:
+                converged = True
+                break
+        value_vector[states] = local
+        return converged
+
+    def initial_values(self) -> tuple:
+        """
+        Return the states to update and the initial values. With precompute, the states with values known from the
+        qualitative analysis are fixed.
+
+        :return: the state ids to update and the value of every state id
+        """
+        if not self.precompute:
+            return np.arange(len(self.mdp.states)), np.zeros(len(self.mdp.states))
+        sets = self.mdp.qualitative_sets()
+        return sets.maybe, sets.fixed_value.copy()
+
+    def solve(self) -> None:
+        reward_vector = self.mdp.reward_vector()
+        self.iterations = 0
+        self.backups = 0
+        with self.timed("precompute"):
+            states, value_vector = self.initial_values()
+        with self.timed("solve"):
+            self.converged = self.iterate_states(states, value_vector, reward_vector)
+        self.status = "converged" if self.converged else "iteration limit"
+        if not self.converged:
+            self.log(
+                "Value iteration did not converge in {} iterations.".format(self.max_iter)
+            )
+
+        with self.timed("extract"):
+            q = self.q_values(value_vector, reward_vector)
+            self.policy_vector = q.argmax(axis=1)
+            self.value_vector = q.max(axis=1)
+            self.set_policy_and_value(self.policy_vector, self.value_vector)
+        self.report()
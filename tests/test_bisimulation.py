@@ -0,0 +1,64 @@
+import numpy as np
+from numpy.testing import assert_allclose
+from scipy.sparse import csr_matrix
+
+from mdp.bisimulation import Bisimulation, bisimulation_partition
+from solver.registry import solve
+from solver.value_iteration import ValueIterationSolver
+
+
+def test_bisimulation_partition():
+    # one action: 0 and 1 both move to 2 or 3 with probability 0.5, 2 and 3 are absorbing, only 3 is rewarded
+    matrix = csr_matrix(
+        ([0.5, 0.5, 0.5, 0.5, 1, 1], ([0, 0, 1, 1, 2, 3], [2, 3, 2, 3, 2, 3])),
+        shape=(4, 4),
+    )
+    reward = np.array([[0], [0], [0], [1]])
+    block = bisimulation_partition(matrix, reward)
+
+    assert block.tolist() == [0, 0, 1, 2]
+
+    # once 1 moves to 3 surely, it is not bisimilar to 0 anymore
+    matrix = csr_matrix(
+        ([0.5, 0.5, 1, 1, 1], ([0, 0, 1, 2, 3], [2, 3, 3, 2, 3])), shape=(4, 4)
+    )
+    block = bisimulation_partition(matrix, reward)
+
+    assert len(set(block.tolist())) == 4
+
+
+def test_bisimulation_product_mdp(construct_product_mdp):
+    product_mdp = construct_product_mdp
+    bisimulation = Bisimulation(product_mdp)
+
+    assert bisimulation.num_blocks < len(product_mdp.states)
+    assert len(bisimulation.quotient.states) == bisimulation.num_blocks
+    assert bisimulation.quotient.init == bisimulation.quotient.states[
+        bisimulation.block_of(product_mdp.init)
+    ]
+
+    solver = ValueIterationSolver(product_mdp, tol=1e-8)
+    solver.solve()
+    quotient_solver = ValueIterationSolver(bisimulation.quotient, tol=1e-8)
+    quotient_solver.solve()
+    policy, value = bisimulation.lift_policy_and_value(
+        quotient_solver.policy_vector, quotient_solver.value_vector
+    )
+
+    for s in product_mdp.states:
+        assert_allclose(value[s], solver.value[s], atol=1e-6)
+        assert product_mdp.actions.index(policy[s]) in np.flatnonzero(
+            np.isclose(
+                solver.q_values(solver.value_vector)[product_mdp.states.index(s)],
+                solver.value[s],
+            )
+        )
+
+
+def test_solve_minimize(construct_product_mdp):
+    result = solve(construct_product_mdp, backend="highs")
+    minimized = solve(construct_product_mdp, backend="highs", minimize=True)
+
+    assert "minimize" in minimized.timing
+    assert len(minimized.value) == len(construct_product_mdp.states)
+    assert_allclose(minimized.value, result.value, atol=1e-6)
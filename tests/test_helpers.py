@@ -1,6 +1,9 @@
 import pytest
 from wdfa.helpers import sync
-from wdfa.helpers import ordered_or, prioritized_conj
+import numpy as np
+from wdfa.helpers import get_wdfa_from_dfa, ordered_or, prioritized_conj
+from wdfa.helpers import ordered_or_all, prioritized_conj_all
+from dfa.examples import DFA_1, DFA_2, DFA_3, DFA_6, DFA_7
 
 ORDERED_OR_TEST_CASE_SIMPLE = (
     (("0", "0"), "E", ("0", "0"), 0),
@@ -49,6 +52,27 @@ def test_sync(get_wdfa_from_eventually_a_dfa, get_wdfa_from_eventually_b_dfa):
     sync_wdfa.validate()
 
 
+def test_sync_reachable(get_wdfa_from_not_a_until_b_dfa, get_wdfa_from_eventually_a_dfa):
+    wdfa1, wdfa2 = get_wdfa_from_not_a_until_b_dfa, get_wdfa_from_eventually_a_dfa
+    symbols1, symbols2 = set(wdfa1.input_symbols), set(wdfa2.input_symbols)
+    transitions1 = {q: dict(t) for q, t in wdfa1.transitions.items()}
+    sync_wdfa = sync(wdfa1, wdfa2)
+
+    # the inputs are not modified
+    assert wdfa1.input_symbols == symbols1 and wdfa2.input_symbols == symbols2
+    assert wdfa1.transitions == transitions1
+    # every state is reachable from the initial state
+    states, frontier = {sync_wdfa.initial_state}, [sync_wdfa.initial_state]
+    while frontier:
+        q = frontier.pop()
+        for nq in sync_wdfa.transitions[q].values():
+            if nq not in states:
+                states.add(nq)
+                frontier.append(nq)
+    assert states == set(sync_wdfa.states)
+    assert len(sync_wdfa.states) < (len(wdfa1.states) - 1) * (len(wdfa2.states) - 1) + 1
+
+
 @pytest.mark.parametrize("q, a, nq, w", ORDERED_OR_TEST_CASE_SIMPLE)
 def test_ordered_or_simple(
     get_wdfa_from_eventually_a_dfa, get_wdfa_from_eventually_b_dfa, q, a, nq, w
@@ -98,3 +122,58 @@ def test_prioritized_conj_complex(
     wdfa2 = ordered_or(get_wdfa_from_eventually_a_dfa, get_wdfa_from_eventually_b_dfa)
     wdfa3 = prioritized_conj(wdfa1, wdfa2)
     assert wdfa3.weight[q, a, nq] == w
+
+
+def run(wdfa, word):
+    q = wdfa.initial_state
+    for a in word:
+        q = wdfa.transitions[q][a]
+    return wdfa.weight[q, "end", "sink"]
+
+
+WORDS = ("", "a", "b", "E", "ab", "ba", "Eb", "aE", "Eab", "bEa", "aaE", "bbE")
+
+
+@pytest.mark.parametrize("compose", (ordered_or, prioritized_conj))
+def test_minimize(compose):
+    wdfa_3, wdfa_1, wdfa_2 = (get_wdfa_from_dfa(dfa) for dfa in (DFA_3, DFA_1, DFA_2))
+    wdfa = compose(compose(wdfa_3, wdfa_1, minimize=True), wdfa_2, minimize=True)
+    reference = compose(compose(wdfa_3, wdfa_1), wdfa_2)
+
+    assert len(wdfa.states) < len(reference.states)
+    assert wdfa.initial_state == reference.initial_state
+    assert "sink" in wdfa.states
+    assert wdfa.opt == reference.opt
+    for word in WORDS:
+        assert run(wdfa, word) == run(reference, word)
+
+
+def test_trim(get_wdfa_from_eventually_a_dfa, get_wdfa_from_eventually_b_dfa):
+    wdfa = ordered_or(get_wdfa_from_eventually_a_dfa, get_wdfa_from_eventually_b_dfa)
+    wdfa.states.add("unreachable")
+    wdfa.transitions["unreachable"] = dict(wdfa.transitions["sink"])
+    wdfa.trim()
+
+    assert "unreachable" not in wdfa.states
+    assert "unreachable" not in wdfa.transitions
+    wdfa.validate()
+
+
+@pytest.mark.parametrize(
+    "compose, compose_all", ((ordered_or, ordered_or_all), (prioritized_conj, prioritized_conj_all))
+)
+@pytest.mark.parametrize("minimize", (False, True))
+def test_compose_all(compose, compose_all, minimize):
+    dfas = (DFA_3, DFA_1, DFA_6, DFA_2, DFA_7)
+    chain = get_wdfa_from_dfa(dfas[0])
+    for dfa in dfas[1:]:
+        chain = compose(chain, get_wdfa_from_dfa(dfa), minimize=minimize)
+    wdfa = compose_all([get_wdfa_from_dfa(dfa) for dfa in dfas], minimize=minimize)
+
+    assert wdfa.opt == chain.opt
+    assert len(wdfa.states) == len(chain.states)
+    rng = np.random.default_rng(0)
+    symbols = sorted(wdfa.input_symbols - {"end"})
+    for _ in range(200):
+        word = rng.choice(symbols, size=rng.integers(0, 8)).tolist()
+        assert run(wdfa, word) == run(chain, word)
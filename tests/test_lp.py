@@ -25,3 +25,24 @@ def test_lp_2(construct_mdp_with_reward_2, s, a):
 
     assert lp_solver.policy[s] == a
     assert lp_solver.value[s] > 0
+
+
+@pytest.mark.parametrize("s, a", LP_TEST_CASE_1)
+def test_lp_highs_1(construct_mdp_with_reward_1, s, a):
+    lp_solver = LPSolver(construct_mdp_with_reward_1, backend="highs")
+
+    lp_solver.solve()
+
+    assert lp_solver.policy[s] == a
+    assert lp_solver.value[s] > 0
+
+
+def test_lp_backends_agree(construct_product_mdp):
+    cbc_solver = LPSolver(construct_product_mdp)
+    cbc_solver.solve()
+    highs_solver = LPSolver(construct_product_mdp, backend="highs")
+    highs_solver.solve()
+
+    for s in construct_product_mdp.states:
+        assert highs_solver.policy[s] == cbc_solver.policy[s]
+        assert abs(highs_solver.value[s] - cbc_solver.value[s]) < 1e-6
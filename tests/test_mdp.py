@@ -1,7 +1,15 @@
+import os
+import pickle
 import pytest
 import numpy as np
 from itertools import product
 from numpy.testing import assert_array_equal
+from scipy.sparse import csr_matrix
+
+from mdp.mdp import MDP
+from mdp.sampling import TransitionSampler
+
+ENVIRONMENT_DIR = "/home/lening/Desktop/qualitative_choice_logic/environment/8 x 8"
 
 
 NEIGHBORS_TEST_CASES = (
@@ -149,3 +157,140 @@ def test_adjusted_transition(construct_mdp, s, a, ns, p):
     mdp = construct_mdp
     mdp.adjust_randomness(P)
     assert_array_equal(mdp.transitions[s][a][ns], p)
+
+
+@pytest.mark.parametrize("environment", ("1.yaml", "2.yaml", "3.yaml"))
+def test_grid_transition_arrays(environment):
+    mdp = MDP(file_path=os.path.join(ENVIRONMENT_DIR, environment))
+    grid_actions = [a for a in mdp.actions if a != "aT"]
+    grid_states = [s for s in mdp.states if s != "sT"]
+
+    expected = {}
+    for s, a in product(grid_states, grid_actions):
+        n_d_s = mdp.deterministic_transition(s, a)
+        if s in mdp.obstacles:
+            expected[s, a, s] = 1
+            continue
+        sum_prob = 0
+        for ns in mdp.neighbors(s, a):
+            if ns != n_d_s:
+                expected[s, a, ns] = mdp.randomness
+                sum_prob += mdp.randomness
+        expected[s, a, n_d_s] = 1 - sum_prob
+
+    computed = {
+        (grid_states[i], grid_actions[k], grid_states[j]): p
+        for i, k, j, p in zip(*mdp.grid_transition_arrays())
+    }
+    assert computed == expected
+
+
+def test_transition_matrix_shape(construct_mdp):
+    mdp = construct_mdp
+    assert mdp.transition_matrix.shape == (
+        len(mdp.states) * len(mdp.actions),
+        len(mdp.states),
+    )
+    assert_array_equal(mdp.transition_matrix.sum(axis=1), 1)
+
+
+def test_transition_view_assignment(construct_mdp):
+    mdp = construct_mdp
+    mdp.transitions[1, 0][0][1, 1] = 0.5
+    mdp.transitions[1, 0][0][1, 0] = 0.25
+    assert mdp.transitions[1, 0][0][1, 1] == 0.5
+    assert mdp.transitions[1, 0][0][1, 0] == 0.25
+    assert (1, 0) in mdp.transitions[1, 0][0]
+    assert (5, 5) not in mdp.transitions[1, 0][0]
+
+
+def test_pickle(construct_mdp):
+    mdp = pickle.loads(pickle.dumps(construct_mdp))
+    assert_array_equal(
+        mdp.transition_matrix.toarray(), construct_mdp.transition_matrix.toarray()
+    )
+
+
+def test_label_masks(construct_mdp):
+    mdp = construct_mdp
+    mdp.L[1, 1] = frozenset({"a", "b"})
+    bits = mdp.proposition_bits()
+    masks = mdp.label_masks(bits)
+
+    assert "E" not in bits
+    assert masks[mdp.states.index((1, 1))] == 1 << bits["a"] | 1 << bits["b"]
+    assert masks[mdp.states.index((1, 6))] == 1 << bits["a"]
+    assert masks[mdp.states.index((0, 0))] == 0
+    assert masks[mdp.states.index("sT")] == 1 << bits["end"]
+
+
+def test_labeling_index(construct_mdp):
+    mdp = construct_mdp
+    assert mdp.L.states_with("a") == [(1, 6)]
+    assert mdp.L.states_with("end") == ["sT"]
+    assert sorted(mdp.L.states_with("o")) == sorted(mdp.obstacles)
+    for s in mdp.states:
+        assert mdp.L.labels[mdp.L.ids[mdp.states.index(s)]] == mdp.L[s]
+
+    mdp.L[1, 6] = "b"
+    assert mdp.L.states_with("a") == []
+    assert mdp.L.states_with("b") == [(1, 6), (4, 4)]
+    mdp.L[2, 2] = ["a", "c"]
+    assert mdp.L[2, 2] == frozenset({"a", "c"})
+    assert mdp.L.states_with({"a", "c"}) == [(2, 2)]
+    assert pickle.loads(pickle.dumps(mdp)).L.states_with("b") == [(1, 6), (4, 4)]
+
+
+def test_add_remove_obstacle(construct_mdp):
+    mdp = construct_mdp
+    # the cached ids of the labels follow the changes
+    assert (5, 5) not in mdp.L.states_with("o")
+    mdp.add_obstacle((5, 5))
+    assert mdp.L[5, 5] == "o"
+    assert (5, 5) in mdp.L.states_with("o")
+    for a in (0, 1, 2, 3):
+        assert mdp.transitions[5, 5][a][5, 5] == 1
+    assert mdp.transitions[5, 4][0][5, 5] > 0
+
+    mdp.remove_obstacle((5, 5), label="c")
+    assert mdp.L.states_with("c") == [(1, 0), (5, 5)]
+    assert (5, 5) not in mdp.L.states_with("o")
+    assert mdp.transitions[5, 5][0][5, 6] > 0
+
+
+def test_seeded_stochastic_transition(construct_mdp):
+    mdp = construct_mdp
+    mdp.seed(0)
+    samples = [mdp.stochastic_transition((3, 4), 2) for _ in range(2000)]
+    mdp.seed(0)
+    assert [mdp.stochastic_transition((3, 4), 2) for _ in range(2000)] == samples
+    assert samples.count((3, 3)) / len(samples) == pytest.approx(0.8, abs=0.03)
+
+    # the sampling tables follow the transitions
+    mdp.adjust_randomness(P)
+    samples = [mdp.stochastic_transition((3, 4), 2) for _ in range(2000)]
+    assert samples.count((3, 3)) / len(samples) == pytest.approx(1 - 2 * P, abs=0.03)
+    mdp.transitions[3, 4][2][3, 3] = 0
+    mdp.transitions[3, 4][2][4, 4] = 1
+    mdp.transitions[3, 4][2][2, 4] = 0
+    assert mdp.stochastic_transition((3, 4), 2) == (4, 4)
+
+
+class AlmostOne(object):
+    # a random generator whose draws are the largest float below 1
+    def random(self, shape):
+        return np.full(shape, np.nextafter(1, 0))
+
+
+def test_transition_sampler_rows():
+    # the draws stay in their row, even where row + u would round to the next row
+    row = 2 ** 23
+    matrix = csr_matrix(
+        ([0.5, 0.5, 1.0], ([row, row, row + 1], [4, 5, 3])), shape=(row + 2, 6)
+    )
+    sampler = TransitionSampler(matrix)
+
+    assert sampler.sample([row, row + 1], AlmostOne()).tolist() == [5, 3]
+    samples = sampler.sample(np.full(10000, row), np.random.default_rng(0))
+    assert set(samples.tolist()) == {4, 5}
+    assert (samples == 4).mean() == pytest.approx(0.5, abs=0.03)
@@ -0,0 +1,36 @@
+from conftest import PRODUCT_MDP_POLICY
+
+import pytest
+from numpy.testing import assert_allclose
+
+from solver.lp_evaluator import LPEvaluator
+from solver.policy_evaluator import PolicyEvaluator
+
+
+@pytest.mark.parametrize("method", ("direct", "iterative"))
+def test_policy_evaluator(construct_product_mdp, method):
+    product_mdp = construct_product_mdp
+    lp_evaluator = LPEvaluator(product_mdp, policy_path=PRODUCT_MDP_POLICY)
+    lp_evaluator.evaluate()
+
+    evaluator = PolicyEvaluator(
+        product_mdp, policy_path=PRODUCT_MDP_POLICY, method=method
+    )
+    evaluator.evaluate()
+
+    for i, s in enumerate(product_mdp.states):
+        assert_allclose(evaluator.value[s], lp_evaluator.v[i].x, atol=1e-6)
+
+
+def test_policy_evaluator_set_policy(construct_product_mdp, product_mdp_policy):
+    product_mdp = construct_product_mdp
+    policy = dict(product_mdp_policy)
+    for s in product_mdp.states:
+        policy[s] = "aT"
+
+    evaluator = PolicyEvaluator(product_mdp)
+    evaluator.set_policy(policy)
+    evaluator.evaluate()
+
+    for s in product_mdp.states:
+        assert evaluator.value[s] == product_mdp.reward[s, "aT"]
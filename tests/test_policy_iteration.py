@@ -0,0 +1,64 @@
+import pytest
+from numpy.testing import assert_allclose
+
+from solver.lp_solver import LPSolver
+from solver.policy_iteration import PolicyIterationSolver, ModifiedPolicyIterationSolver
+from tests.test_lp import LP_TEST_CASE_1, LP_TEST_CASE_2
+
+
+@pytest.mark.parametrize("solver_class", (PolicyIterationSolver, ModifiedPolicyIterationSolver))
+@pytest.mark.parametrize("s, a", LP_TEST_CASE_1)
+def test_policy_iteration_1(construct_mdp_with_reward_1, solver_class, s, a):
+    solver = solver_class(construct_mdp_with_reward_1)
+    solver.solve()
+
+    assert solver.converged
+    assert solver.policy[s] == a
+    assert solver.value[s] > 0
+
+
+@pytest.mark.parametrize("solver_class", (PolicyIterationSolver, ModifiedPolicyIterationSolver))
+@pytest.mark.parametrize("s, a", LP_TEST_CASE_2)
+def test_policy_iteration_2(construct_mdp_with_reward_2, solver_class, s, a):
+    solver = solver_class(construct_mdp_with_reward_2)
+    solver.solve()
+
+    assert solver.converged
+    assert solver.policy[s] == a
+    assert solver.value[s] > 0
+
+
+@pytest.mark.parametrize("solver_class", (PolicyIterationSolver, ModifiedPolicyIterationSolver))
+def test_policy_iteration_product_mdp(construct_product_mdp, solver_class):
+    product_mdp = construct_product_mdp
+    lp_solver = LPSolver(product_mdp)
+    lp_solver.solve()
+    solver = solver_class(product_mdp)
+    solver.solve()
+
+    assert solver.converged
+    for s in product_mdp.states:
+        assert_allclose(solver.value[s], lp_solver.value[s], atol=1e-5)
+
+
+def test_policy_iteration_warm_start(construct_product_mdp):
+    product_mdp = construct_product_mdp
+    cold = PolicyIterationSolver(product_mdp, warm_start_tol=None)
+    cold.solve()
+    warm = PolicyIterationSolver(product_mdp)
+    warm.solve()
+
+    assert warm.converged
+    assert warm.iterations <= cold.iterations
+    assert warm.warm_start_iterations > 0 and cold.warm_start_iterations == 0
+    assert_allclose(warm.value_vector, cold.value_vector, atol=1e-6)
+
+
+@pytest.mark.parametrize("solver_class", (PolicyIterationSolver, ModifiedPolicyIterationSolver))
+def test_policy_iteration_max_iter_0(construct_product_mdp, solver_class):
+    solver = solver_class(construct_product_mdp, max_iter=0)
+    solver.solve()
+
+    assert not solver.converged
+    assert solver.iterations == 0
+    assert len(solver.policy) == len(construct_product_mdp.states)
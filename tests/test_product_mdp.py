@@ -2,6 +2,8 @@ from numpy.testing import assert_array_equal
 import numpy as np
 import pytest
 
+from product_mdp.product_mdp import ProductMDP
+
 
 def test_product_mdp_transition(construct_product_mdp):
     product_mdp = construct_product_mdp
@@ -37,3 +39,37 @@ def test_product_mdp_transition_matrix(construct_product_mdp, s, a, ns, p):
         raise ValueError(
             "s: {}, a:{}, p: {}".format(s, a, product_mdp.transitions[s][a])
         )
+
+
+def test_reachable_product_mdp(construct_mdp, get_wdfa_from_eventually_a_dfa):
+    full = ProductMDP(construct_mdp, get_wdfa_from_eventually_a_dfa)
+    reachable = ProductMDP(
+        construct_mdp, get_wdfa_from_eventually_a_dfa, reachable=True
+    )
+
+    assert full.num_pruned_states == 0
+    assert reachable.num_pruned_states > 0
+    assert len(reachable.states) + reachable.num_pruned_states == len(full.states)
+    assert reachable.init in reachable.states
+    assert ("sT", "sink") in reachable.states
+    assert ("sT", "0") not in reachable.states
+
+    # no zero entries are stored and the reachable transitions agree with the full product
+    assert np.all(reachable.transition_matrix.data > 0)
+    for s in reachable.states:
+        for a in reachable.actions:
+            assert dict(reachable.transitions[s][a]) == {
+                ns: p for ns, p in full.transitions[s][a].items() if p > 0
+            }
+
+
+def test_product_mdp_rewards(construct_product_mdp):
+    product_mdp = construct_product_mdp
+    wdfa = product_mdp._wdfa
+    for (s, q) in product_mdp.states:
+        for a in product_mdp.actions:
+            if a == "aT" and q != "sink" and wdfa.weight[q, "end", "sink"] > 0:
+                expected = wdfa.opt - wdfa.weight[q, "end", "sink"] + 1
+            else:
+                expected = 0
+            assert product_mdp.reward[(s, q), a] == expected
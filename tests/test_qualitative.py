@@ -0,0 +1,100 @@
+import numpy as np
+import yaml
+from numpy.testing import assert_allclose
+from scipy.sparse import csr_matrix
+
+from dfa.examples import DFA_6, DFA_7
+from mdp.mdp import MDP
+from mdp.qualitative import backward_reachable, prob0, prob1e
+from product_mdp.product_mdp import ProductMDP
+from solver.lp_solver import LPSolver
+from solver.value_iteration import ValueIterationSolver
+from wdfa.helpers import get_wdfa_from_dfa, ordered_or
+
+
+def test_prob0_prob1e():
+    # state 0: action 0 moves to 1 or 2, action 1 stays; state 1 is the target; state 2 is a trap
+    matrix = csr_matrix(
+        (
+            [0.5, 0.5, 1, 1, 1, 1, 1],
+            ([0, 0, 1, 2, 3, 4, 5], [1, 2, 0, 1, 1, 2, 2]),
+        ),
+        shape=(6, 3),
+    )
+    graph = csr_matrix(([1, 1, 1, 1, 1], ([0, 0, 0, 1, 2], [0, 1, 2, 1, 2])), shape=(3, 3))
+    targets = np.array([False, True, False])
+
+    assert backward_reachable(graph, targets).tolist() == [True, True, False]
+    assert prob0(graph, targets).tolist() == [False, False, True]
+    assert prob1e(matrix, 2, targets).tolist() == [False, True, False]
+
+
+def test_qualitative_sets(construct_product_mdp):
+    product_mdp = construct_product_mdp
+    sets = product_mdp.qualitative_sets()
+    lp_solver = LPSolver(product_mdp)
+    lp_solver.solve()
+
+    assert len(sets.maybe) < len(product_mdp.states)
+    assert not (sets.zero & sets.final).any()
+    assert sets.final.any()
+    for i in np.flatnonzero(sets.fixed):
+        assert_allclose(
+            lp_solver.value_vector[i], sets.fixed_value[i], atol=1e-6
+        )
+
+
+def test_qualitative_sets_infeasible(
+    construct_a_inaccessiable_mdp, get_wdfa_from_eventually_a_dfa
+):
+    product_mdp = ProductMDP(construct_a_inaccessiable_mdp, get_wdfa_from_eventually_a_dfa)
+    sets = product_mdp.qualitative_sets()
+
+    assert product_mdp.init in sets.decode(sets.zero)
+    assert product_mdp.init not in sets.decode(sets.almost_sure)
+
+
+def test_value_iteration_precompute(construct_product_mdp):
+    solver = ValueIterationSolver(construct_product_mdp, tol=1e-8)
+    solver.solve()
+    reference = ValueIterationSolver(construct_product_mdp, tol=1e-8, precompute=False)
+    reference.solve()
+
+    assert solver.backups < reference.backups
+    assert_allclose(solver.value_vector, reference.value_vector, atol=1e-6)
+
+
+def test_precompute_mid_sized_grid(tmp_path):
+    n = 30
+    environment = {
+        "name": "30 x 30",
+        "grid_world_size": [n, n],
+        "actions": [0, 1, 2, 3],
+        "obstacles": [(n // 2, j) for j in range(1, n - 1)]
+        + [(i, n // 3) for i in range(2, n // 2 - 1)],
+        "init": (n - 1, n - 1),
+        "L": {(1, 0): "c", (1, n - 2): "a", (n // 2 + 2, n // 2): "b"},
+        "AP": ["a", "b", "c", "E", "o"],
+        "randomness": 0.1,
+        "stuck_prob": 1,
+        "gamma": 0.99,
+    }
+    with open(tmp_path / "grid.yaml", "w") as f:
+        yaml.dump(environment, f)
+    wdfa = ordered_or(get_wdfa_from_dfa(DFA_6), get_wdfa_from_dfa(DFA_7))
+    product_mdp = ProductMDP(MDP(file_path=str(tmp_path / "grid.yaml")), wdfa, reachable=True)
+
+    solver = ValueIterationSolver(product_mdp, verbose=False)
+    solver.solve()
+    reference = ValueIterationSolver(product_mdp, verbose=False, precompute=False)
+    reference.solve()
+
+    # the precompute costs less than the backups it saves could
+    assert solver.timing["precompute"] < reference.timing["solve"]
+    assert solver.backups < reference.backups
+    assert_allclose(solver.value_vector, reference.value_vector, atol=1e-4)
+
+    # the almost sure states are only computed on demand
+    sets = product_mdp.qualitative_sets()
+    assert getattr(sets, "_almost_sure", None) is None
+    assert sets.almost_sure[product_mdp.states.index(product_mdp.init)]
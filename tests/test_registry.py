@@ -0,0 +1,58 @@
+import pytest
+from numpy.testing import assert_allclose
+
+from solver.registry import available_backends, solve
+from tests.test_lp import LP_TEST_CASE_1
+
+BACKENDS = (
+    "cbc",
+    "highs",
+    "value_iteration",
+    "policy_iteration",
+    "modified_policy_iteration",
+    "topological",
+)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("s, a", LP_TEST_CASE_1)
+def test_solve_1(construct_mdp_with_reward_1, backend, s, a):
+    result = solve(construct_mdp_with_reward_1, backend=backend)
+
+    assert result.backend == backend
+    assert result.policy_dict()[s] == a
+    assert result.value_dict()[s] > 0
+    assert "total" in result.timing
+
+
+def test_solve_backends_agree(construct_product_mdp, capfd):
+    results = [solve(construct_product_mdp, backend=backend) for backend in BACKENDS]
+    solve(construct_product_mdp, backend="cbc", minimize=True)
+
+    # the backends are quiet, including the C libraries
+    assert capfd.readouterr().out == ""
+    for result in results[1:]:
+        assert_allclose(result.value, results[0].value, atol=1e-4)
+        assert_allclose(result.objective, results[0].objective, atol=1e-4)
+
+
+def test_solve_result_status(construct_product_mdp):
+    assert solve(construct_product_mdp, backend="cbc").status == "optimal"
+    assert solve(construct_product_mdp, backend="highs").status == "optimal"
+
+    result = solve(construct_product_mdp, backend="value_iteration", max_iter=3)
+    assert result.status == "iteration limit"
+    assert result.iterations == 3
+    assert "iterations" in str(result)
+
+    # the sweeps of the warm start of policy iteration are not improvements
+    result = solve(construct_product_mdp, backend="policy_iteration")
+    assert result.warm_start_iterations > 0
+    assert "warm_start" in result.timing
+    assert "warm start iterations" in str(result)
+
+
+def test_solve_unknown_backend(construct_product_mdp):
+    assert set(BACKENDS) <= set(available_backends())
+    with pytest.raises(ValueError):
+        solve(construct_product_mdp, backend="unknown")
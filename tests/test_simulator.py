@@ -1,6 +1,13 @@
 from conftest import construct_mdp, mdp_policy
 
-from simulation.simulator import Simulator
+import pytest
+from numpy.testing import assert_array_equal
+
+from mdp.bisimulation import Bisimulation
+from simulation.batch_simulator import CHUNK_SIZE, BatchSimulator
+from simulation.simulator import Simulator, terminal_mask
+from simulation.trajectories import TrajectoryWriter, read_trajectories
+from utils import save_trajectories
 
 
 def test_mdp_simulation(construct_mdp, mdp_policy):
@@ -28,3 +35,116 @@ def test_product_mdp_simulation(construct_product_mdp, product_mdp_policy):
         assert last_state in mdp._mdp.obstacles or last_state == (1, 6)
     except:
         raise ValueError(simulator.visualizable_trajectory)
+
+
+def test_batch_simulation(construct_product_mdp, product_mdp_policy):
+    mdp = construct_product_mdp
+    simulator = BatchSimulator(mdp, product_mdp_policy, seed=0)
+    trajectories = simulator.run(1000)
+
+    assert len(trajectories) == 1000
+    assert trajectories.finished.all()
+    assert (trajectories.states[trajectories.offsets[:-1]] == mdp.states.index(mdp.init)).all()
+    assert simulator.terminal[trajectories.last_states].all()
+    # only the last state of every trajectory is terminal
+    assert simulator.terminal[trajectories.states].sum() == 1000
+    for k in range(10):
+        states = trajectories.decode(k)
+        for s, ns in zip(states, states[1:]):
+            assert mdp.transitions[s][product_mdp_policy[s]][ns] > 0
+
+    assert_array_equal(
+        BatchSimulator(mdp, product_mdp_policy, seed=0).run(1000).states, trajectories.states
+    )
+
+
+def test_batch_simulation_max_steps(construct_mdp, mdp_policy):
+    trajectories = BatchSimulator(construct_mdp, mdp_policy, target=(1, 0), seed=0).run(
+        100, max_steps=2
+    )
+
+    assert (trajectories.lengths <= 3).all()
+    assert trajectories.finished[trajectories.lengths < 3].all()
+
+
+def test_sample_trajectories(construct_mdp, mdp_policy):
+    trajectories = Simulator(construct_mdp, mdp_policy, target=(1, 0)).sample_trajectories(
+        100, seed=0
+    )
+
+    assert len(trajectories) == 100
+    for trajectory in trajectories:
+        assert trajectory[0] == construct_mdp.init
+        assert trajectory[-1] in construct_mdp.obstacles or trajectory[-1] == (1, 0)
+
+    simulator = Simulator(construct_mdp, mdp_policy, target=(1, 0))
+    assert simulator.sample_trajectories(0, seed=0) == []
+
+
+def test_parallel_simulation(construct_product_mdp, product_mdp_policy):
+    mdp = construct_product_mdp
+    number = 2 * CHUNK_SIZE + 10
+    trajectories = BatchSimulator(mdp, product_mdp_policy, seed=1).run(number)
+    parallel_trajectories = BatchSimulator(mdp, product_mdp_policy, seed=1).run(number, workers=2)
+
+    assert len(parallel_trajectories) == number
+    assert_array_equal(parallel_trajectories.offsets, trajectories.offsets)
+    assert_array_equal(parallel_trajectories.states, trajectories.states)
+
+    trajectories = Simulator(mdp, product_mdp_policy).sample_trajectories(20, workers=2, seed=1)
+    assert trajectories == Simulator(mdp, product_mdp_policy).sample_trajectories(20, seed=1)
+
+
+def test_trajectory_sink(construct_product_mdp, product_mdp_policy, tmp_path):
+    mdp = construct_product_mdp
+    path = str(tmp_path / "trajectories")
+    expected = BatchSimulator(mdp, product_mdp_policy, seed=2).run(CHUNK_SIZE + 10)
+
+    simulator = BatchSimulator(mdp, product_mdp_policy, seed=2)
+    assert simulator.save(path, CHUNK_SIZE + 10) == CHUNK_SIZE + 10
+    more = BatchSimulator(mdp, product_mdp_policy, seed=3)
+    assert more.save(path, 5) == CHUNK_SIZE + 15
+
+    trajectories = read_trajectories(path)
+    assert len(trajectories) == CHUNK_SIZE + 15
+    assert_array_equal(trajectories.offsets[: CHUNK_SIZE + 11], expected.offsets)
+    assert_array_equal(trajectories.states[: expected.offsets[-1]], expected.states)
+    assert trajectories.decode(0) == expected.decode(0)
+    assert trajectories.finished.all()
+
+    # the text export is the format of save_trajectories
+    trajectories.export_text(str(tmp_path / "exported.txt"), lambda s: s[0])
+    save_trajectories(expected.to_lists(lambda s: s[0]), str(tmp_path))
+    with open(tmp_path / "exported.txt") as f:
+        lines = f.readlines()
+    with open(tmp_path / "trajectories.txt") as f:
+        assert lines[: CHUNK_SIZE + 10] == f.readlines()
+    assert len(lines) == CHUNK_SIZE + 15
+
+    # a sink only holds the state ids of one state space
+    with pytest.raises(ValueError):
+        TrajectoryWriter(path, mdp._mdp.states)
+    assert len(read_trajectories(path)) == CHUNK_SIZE + 15
+
+
+def test_seeded_simulation(construct_mdp, mdp_policy):
+    trajectories = []
+    for _ in range(2):
+        construct_mdp.seed(0)
+        simulator = Simulator(mdp=construct_mdp, policy=mdp_policy, target=(1, 0))
+        for _ in range(5):
+            simulator.visualizable_trajectory = []
+            simulator.simulate()
+            trajectories.append(simulator.visualizable_trajectory)
+
+    assert trajectories[:5] == trajectories[5:]
+
+
+def test_terminal_mask_plain_labels(construct_mdp):
+    mdp = construct_mdp
+    quotient = Bisimulation(mdp).quotient
+    expected = [quotient.L[s] in ("end", "o") for s in quotient.states]
+    assert_array_equal(terminal_mask(quotient), expected)
+
+    quotient.L = dict(quotient.L)
+    assert_array_equal(terminal_mask(quotient), expected)
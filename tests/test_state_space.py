@@ -0,0 +1,48 @@
+import pytest
+from numpy.testing import assert_array_equal
+
+from mdp.state_space import StateSpace, GridStateSpace, ProductStateSpace
+
+
+def test_state_space():
+    states = StateSpace([(0, 0), (0, 1), "sT"])
+    assert states.index("sT") == 2
+    assert (0, 1) in states
+    assert (1, 1) not in states
+    with pytest.raises(ValueError):
+        states.index((1, 1))
+
+    states.remove((0, 0))
+    assert list(states) == [(0, 1), "sT"]
+    assert states.index("sT") == 1
+
+
+def test_grid_state_space():
+    states = GridStateSpace([3, 4])
+    states.append("sT")
+    assert states.index((2, 1)) == 9
+    assert_array_equal(states.encode([(2, 1), (0, 3)]), [9, 3])
+    assert_array_equal(states.encode_cells([[2, 1], [0, 3]]), [9, 3])
+    assert_array_equal(states.decode_cells([9, 3]), [[2, 1], [0, 3]])
+    assert states.decode([12]) == ["sT"]
+
+
+def test_product_state_space():
+    base = StateSpace([(0, 0), (0, 1), "sT"])
+    automaton = StateSpace(["0", "1", "sink"])
+    states = ProductStateSpace(base, automaton)
+
+    assert len(states) == 9
+    assert list(states) == [(s, q) for s in base for q in automaton]
+    for i, s in enumerate(states):
+        assert states.index(s) == i
+        assert states[i] == s
+    assert ("sT", "sink") in states
+    assert ("sT", "2") not in states
+
+    ids = states.encode([((0, 1), "1"), ("sT", "0")])
+    assert_array_equal(ids, [4, 6])
+    base_ids, automaton_ids = states.split(ids)
+    assert_array_equal(base_ids, [1, 2])
+    assert_array_equal(automaton_ids, [1, 0])
+    assert_array_equal(states.encode_pairs(base_ids, automaton_ids), ids)
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from simulation.batch_simulator import CHUNK_SIZE, BatchSimulator, chunk_sizes
+from simulation.statistical import FIRST_CHUNK, StatisticalModelChecker, okamoto_samples
+
+
+def reached(mdp, trajectories, q):
+    # whether the automaton state of the product is q at the end of every trajectory, before sT
+    last = trajectories.offsets[1:] - 1
+    ends = trajectories.states[last]
+    at_sink = np.asarray([mdp.states[i][0] == "sT" for i in ends.tolist()])
+    ends[at_sink] = trajectories.states[last[at_sink] - 1]
+    return np.asarray([mdp.states[i][1] == q for i in ends.tolist()])
+
+
+def test_okamoto_samples():
+    assert okamoto_samples(0.01, 0.05) == 18445
+    assert okamoto_samples(0.1, 0.05) < okamoto_samples(0.05, 0.05)
+
+
+def test_estimate(
+    construct_product_mdp,
+    product_mdp_policy,
+    get_wdfa_from_eventually_a_dfa,
+    get_wdfa_from_eventually_b_dfa,
+):
+    mdp = construct_product_mdp
+    checker = StatisticalModelChecker(
+        mdp,
+        product_mdp_policy,
+        [get_wdfa_from_eventually_a_dfa, get_wdfa_from_eventually_b_dfa],
+        seed=0,
+    )
+    result = checker.estimate(epsilon=0.02, delta=0.01)
+
+    assert (result.samples == okamoto_samples(0.02, 0.01)).all()
+    assert (result.lower <= result.estimate).all() and (result.estimate <= result.upper).all()
+    # F a is satisfied when the automaton of the product is in its final state at the end
+    trajectories = BatchSimulator(mdp, product_mdp_policy, seed=1).run(20000)
+    assert result.estimate[0] == pytest.approx(reached(mdp, trajectories, "1").mean(), abs=0.03)
+    assert "estimate" in str(result)
+
+
+def test_satisfied(construct_product_mdp, product_mdp_policy, get_wdfa_from_eventually_a_dfa):
+    mdp = construct_product_mdp
+    checker = StatisticalModelChecker(
+        mdp, product_mdp_policy, [get_wdfa_from_eventually_a_dfa], seed=0
+    )
+    trajectories = BatchSimulator(mdp, product_mdp_policy, seed=2).run(1000)
+
+    np.testing.assert_array_equal(checker.satisfied(trajectories)[0], reached(mdp, trajectories, "1"))
+
+
+def test_sprt(construct_product_mdp, product_mdp_policy, get_wdfa_from_eventually_a_dfa):
+    mdp = construct_product_mdp
+    checker = StatisticalModelChecker(
+        mdp, product_mdp_policy, [get_wdfa_from_eventually_a_dfa], seed=0
+    )
+    estimate = checker.estimate(epsilon=0.02, delta=0.01).estimate[0]
+
+    result = checker.test(theta=estimate - 0.1, indifference=0.02)
+    assert result.decision == [True]
+    assert result.samples[0] < okamoto_samples(0.02, 0.05)
+
+    result = checker.test(theta=estimate + 0.1, indifference=0.02)
+    assert result.decision == [False]
+
+
+def test_sprt_stops_early(construct_product_mdp, product_mdp_policy, get_wdfa_from_eventually_a_dfa):
+    checker = StatisticalModelChecker(
+        construct_product_mdp,
+        product_mdp_policy,
+        [get_wdfa_from_eventually_a_dfa],
+        seed=0,
+        max_steps=200,
+    )
+    simulated = []
+    satisfied = checker.satisfied
+    checker.satisfied = lambda trajectories: simulated.append(len(trajectories)) or satisfied(trajectories)
+
+    result = checker.test(theta=0.2, indifference=0.05)
+    assert result.decision == [True]
+    # the chunks grow from FIRST_CHUNK, so only a few small chunks are simulated
+    assert simulated[0] == FIRST_CHUNK
+    assert sum(simulated) < 4 * FIRST_CHUNK
+
+    simulated.clear()
+    assert checker.estimate(epsilon=0.1).samples[0] == sum(simulated) == okamoto_samples(0.1, 0.05)
+
+
+def test_chunk_sizes():
+    assert chunk_sizes(10, first=4) == [4, 6]
+    assert chunk_sizes(3 * CHUNK_SIZE, first=FIRST_CHUNK)[:3] == [64, 128, 256]
+    assert sum(chunk_sizes(3 * CHUNK_SIZE, first=FIRST_CHUNK)) == 3 * CHUNK_SIZE
+    assert max(chunk_sizes(3 * CHUNK_SIZE, first=FIRST_CHUNK)) == CHUNK_SIZE
+    assert chunk_sizes(CHUNK_SIZE + 1) == [CHUNK_SIZE, 1]
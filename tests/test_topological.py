@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+from scipy.sparse import csr_matrix
+
+from solver.topological import TopologicalValueIterationSolver, topological_levels
+from solver.value_iteration import ValueIterationSolver
+from tests.test_lp import LP_TEST_CASE_1
+
+
+def test_topological_levels():
+    # 0 -> {1, 2}, {1, 2} is a cycle, 2 -> 3, 4 is isolated
+    graph = csr_matrix(
+        (np.ones(5), ([0, 0, 1, 2, 2], [1, 2, 2, 1, 3])), shape=(5, 5)
+    )
+    labels, levels = topological_levels(graph)
+
+    assert labels[1] == labels[2]
+    assert len(levels) == 4
+    assert levels[labels[3]] == 0
+    assert levels[labels[4]] == 0
+    assert levels[labels[1]] == 1
+    assert levels[labels[0]] == 2
+
+
+@pytest.mark.parametrize("s, a", LP_TEST_CASE_1)
+def test_topological_1(construct_mdp_with_reward_1, s, a):
+    solver = TopologicalValueIterationSolver(construct_mdp_with_reward_1, tol=1e-8)
+    solver.solve()
+
+    assert solver.converged
+    assert solver.policy[s] == a
+    assert solver.value[s] > 0
+
+
+def test_topological_product_mdp(construct_product_mdp):
+    product_mdp = construct_product_mdp
+    value_iteration = ValueIterationSolver(product_mdp, tol=1e-8)
+    value_iteration.solve()
+    solver = TopologicalValueIterationSolver(product_mdp, tol=1e-8)
+    solver.solve()
+
+    assert solver.converged
+    assert solver.num_levels > 1
+    assert solver.backups < value_iteration.iterations * len(product_mdp.states)
+    assert_allclose(solver.value_vector, value_iteration.value_vector, atol=1e-6)
+    for s in product_mdp.states:
+        assert solver.policy[s] == value_iteration.policy[s]
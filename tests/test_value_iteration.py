@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from solver.lp_solver import LPSolver
+from solver.value_iteration import ValueIterationSolver
+from tests.test_lp import LP_TEST_CASE_1, LP_TEST_CASE_2
+
+
+@pytest.mark.parametrize("s, a", LP_TEST_CASE_1)
+def test_value_iteration_1(construct_mdp_with_reward_1, s, a):
+    solver = ValueIterationSolver(construct_mdp_with_reward_1, tol=1e-8)
+    solver.solve()
+
+    assert solver.converged
+    assert solver.policy[s] == a
+    assert solver.value[s] > 0
+
+
+@pytest.mark.parametrize("s, a", LP_TEST_CASE_2)
+def test_value_iteration_2(construct_mdp_with_reward_2, s, a):
+    solver = ValueIterationSolver(construct_mdp_with_reward_2, tol=1e-8)
+    solver.solve()
+
+    assert solver.converged
+    assert solver.policy[s] == a
+    assert solver.value[s] > 0
+
+
+def test_value_iteration_product_mdp(construct_product_mdp):
+    product_mdp = construct_product_mdp
+    lp_solver = LPSolver(product_mdp)
+    lp_solver.solve()
+    solver = ValueIterationSolver(product_mdp, tol=1e-6)
+    solver.solve()
+
+    for s in product_mdp.states:
+        assert_allclose(solver.value[s], lp_solver.value[s], atol=1e-5)
+
+
+def test_value_iteration_max_iter(construct_product_mdp):
+    solver = ValueIterationSolver(construct_product_mdp, max_iter=3)
+    solver.solve()
+
+    assert not solver.converged
+    assert solver.iterations == 3
+
+
+def test_value_iteration_single_backup(construct_mdp):
+    mdp = construct_mdp
+    mdp.gamma = 0.9
+    # no transition of (2, 2) stays in (2, 2), so a single backup is exact, also with negative rewards
+    states = np.asarray([mdp.states.index((2, 2))])
+    reward_vector = -np.ones(len(mdp.states) * len(mdp.actions))
+    value_vector = np.zeros(len(mdp.states))
+    solver = ValueIterationSolver(mdp)
+
+    assert solver.iterate_states(states, value_vector, reward_vector)
+    assert value_vector[states[0]] == -1
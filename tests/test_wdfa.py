@@ -1,6 +1,9 @@
+import numpy as np
 import pytest
 from automata.fa.dfa import DFA
 from itertools import product
+from product_mdp.product_mdp import ProductMDP
+from wdfa.compact import CompactWDFA, compress_alphabet
 from wdfa.helpers import get_wdfa_from_dfa
 
 
@@ -34,3 +37,101 @@ def test_completeness():
     wdfa = get_wdfa_from_dfa(dfa)
     for q, a in product(wdfa.states, wdfa.input_symbols):
         assert wdfa.transitions[q][a] in wdfa.states
+
+
+def test_sparse_weights():
+    wdfa = get_wdfa_from_dfa(dfa)
+    assert len(wdfa.weight) == len(wdfa.states) * len(wdfa.input_symbols)
+
+
+def test_compact_wdfa():
+    wdfa = get_wdfa_from_dfa(dfa)
+    compact = CompactWDFA.from_wdfa(wdfa)
+
+    assert compact.delta.dtype == np.int32
+    assert compact.delta.shape == (len(wdfa.states), len(wdfa.input_symbols))
+    assert compact.initial_state == "0"
+    assert compact.end_weight[compact.states.index("1")] == 1
+    assert compact.end_weight[compact.sink_id] == 0
+    assert compact.states[compact.run(["b", "a", "E"])] == "1"
+
+    converted = compact.to_wdfa()
+    assert converted.states == wdfa.states
+    assert converted.transitions == {q: dict(t) for q, t in wdfa.transitions.items()}
+    assert converted.final_states == wdfa.final_states
+    for q, a in product(wdfa.states, wdfa.input_symbols):
+        nq = wdfa.transitions[q][a]
+        assert converted.weight[q, a, nq] == wdfa.weight[q, a, nq]
+
+
+def test_product_mdp_compact_wdfa(construct_mdp, get_wdfa_from_eventually_a_dfa):
+    product_mdp = ProductMDP(construct_mdp, get_wdfa_from_eventually_a_dfa)
+    compact_product_mdp = ProductMDP(
+        construct_mdp, CompactWDFA.from_wdfa(get_wdfa_from_eventually_a_dfa)
+    )
+
+    assert compact_product_mdp.init == product_mdp.init
+    assert (compact_product_mdp.transition_matrix != product_mdp.transition_matrix).nnz == 0
+    assert dict(compact_product_mdp.reward) == dict(product_mdp.reward)
+
+
+def test_compress_alphabet(
+    construct_mdp, get_wdfa_from_eventually_a_dfa, get_wdfa_from_eventually_b_dfa
+):
+    wdfa_a, wdfa_b = compress_alphabet(
+        [get_wdfa_from_eventually_a_dfa, get_wdfa_from_eventually_b_dfa]
+    )
+
+    # F a and F b both ignore E, c and o
+    assert wdfa_a.alphabet == wdfa_b.alphabet
+    assert wdfa_a.symbol_id("E") == wdfa_a.symbol_id("c") == wdfa_a.symbol_id("o")
+    assert len({wdfa_a.symbol_id(a) for a in ("E", "a", "b", "end")}) == 4
+    assert wdfa_a.delta.shape == (len(wdfa_a.states), 4)
+
+    product_mdp = ProductMDP(construct_mdp, get_wdfa_from_eventually_a_dfa)
+    compressed_product_mdp = ProductMDP(construct_mdp, wdfa_a)
+    assert (compressed_product_mdp.transition_matrix != product_mdp.transition_matrix).nnz == 0
+    assert dict(compressed_product_mdp.reward) == dict(product_mdp.reward)
+
+    wdfa = wdfa_b.to_wdfa()
+    for q, a in product(wdfa.states, wdfa.input_symbols):
+        assert wdfa.transitions[q][a] == get_wdfa_from_eventually_b_dfa.transitions[q][a]
+
+
+# F a, read on the bitmasks of the sets of propositions
+EVENTUALLY_A_GUARDS = {
+    "0": [("end", "sink"), ("a", "1"), ("true", "0")],
+    "1": [("end", "sink"), ("true", "1")],
+    "sink": [("true", "sink")],
+}
+
+
+def test_guards(construct_mdp, get_wdfa_from_eventually_a_dfa):
+    automaton = CompactWDFA.from_guards(
+        ["0", "1", "sink"], EVENTUALLY_A_GUARDS, "0", end_weight={"1": 1}, final={"1"}
+    )
+    product_mdp = ProductMDP(construct_mdp, get_wdfa_from_eventually_a_dfa)
+    guarded_product_mdp = ProductMDP(construct_mdp, automaton)
+    assert guarded_product_mdp.init == product_mdp.init
+    assert (guarded_product_mdp.transition_matrix != product_mdp.transition_matrix).nnz == 0
+    assert dict(guarded_product_mdp.reward) == dict(product_mdp.reward)
+
+    # a cell labeled with both a and b
+    construct_mdp.L[1, 1] = frozenset({"a", "b"})
+    guarded_product_mdp = ProductMDP(construct_mdp, automaton)
+    assert guarded_product_mdp.transitions[((1, 2), "0")][2][((1, 1), "1")] > 0
+    with pytest.raises(ValueError):
+        ProductMDP(construct_mdp, get_wdfa_from_eventually_a_dfa)
+
+
+def test_label_table():
+    automaton = CompactWDFA.from_guards(["0", "1", "sink"], EVENTUALLY_A_GUARDS, "0")
+    # 15 propositions, only the observed bitmasks are tabulated
+    bits = {"p{}".format(i): i for i in range(14)}
+    bits["a"], bits["end"] = 14, 15
+    masks = np.asarray([0, 1 << 14 | 3, 1 << 15, 3, 0])
+    labels, table = automaton.label_table(masks, bits)
+
+    assert table.shape == (3, 4)
+    assert table[0, labels].tolist() == [0, 1, 2, 0, 0]
+    assert table[1, labels].tolist() == [1, 1, 2, 1, 1]
@@ -48,7 +48,9 @@ class Visualizer:
             board_size=self.mdp.grid_world_size,
             obs_coords=self.mdp.obstacles,
             sub_goals_coords={
-                k: v for k, v in self.mdp.L.items() if v in {"a", "b", "c"}
+                self.mdp.states[i]: v
+                for v in ("a", "b", "c")
+                for i in self.mdp.label_state_ids(v)
             },
             start_coord=self.trajectory[0],
         )
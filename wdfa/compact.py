@@ -0,0 +1,336 @@
+from itertools import product
+import numpy as np
+
+from mdp.labels import guard_masks, label_mask
+from mdp.state_space import StateSpace
+from wdfa.wdfa import WDFA
+
+
+class CompactWDFA(object):
+    """
+    An array-backed weighted deterministic finite-state automaton defined by
+     1. the states and the input symbols, indexed by integer ids,
+     2. the transition table delta of shape (|Q|, |Sigma|): delta[q, a] is the id of the next state,
+     3. the id of the initial state and the boolean mask of the final states,
+     4. the end weights: end_weight[q] is the weight of the "end" transition of the state q,
+     5. the sparse map of the other non-zero weights: weight[q, a] is the weight of the transition of q with a.
+    The symbols may be classes of equivalent symbols after compress_alphabet, in which case alphabet maps every symbol
+    to the id of its class.
+    An automaton over sets of propositions may instead be given by guards, see from_guards: the transitions of every
+    state are the ordered list of its guards, and the first guard satisfied by a label is taken. Both forms are read
+    on the bitmasks of the labels through label_table.
+    """
+
+    def __init__(
+        self,
+        states: StateSpace,
+        symbols: StateSpace,
+        delta: np.ndarray,
+        initial_id: int,
+        end_weight: np.ndarray,
+        final: np.ndarray = None,
+        weight: dict = None,
+        opt: int = 1,
+        name: str = None,
+        alphabet: dict = None,
+        guards: dict = None,
+    ) -> None:
+        """
+        Initialization
+
+        :param states: the states
+        :param symbols: the input symbols
+        :param delta: the transition table
+        :param initial_id: the id of the initial state
+        :param end_weight: the weight of the end transition of every state
+        :param final: the mask of the final states, defaults to None
+        :param weight: the non-zero weights of the other transitions, defaults to None
+        :param opt: the number of options, defaults to 1
+        :param name: the name, defaults to None
+        :param alphabet: the id of the symbol class of every symbol, defaults to the ids of the symbols
+        :param guards: the list of pairs (guard, id of the next state) of every state id, defaults to None
+        """
+        self.states = states
+        self.symbols = symbols
+        self.delta = np.asarray(delta, dtype=np.int32)
+        self.initial_id = initial_id
+        self.end_weight = np.asarray(end_weight)
+        self.final = (
+            np.zeros(len(states), dtype=bool) if final is None else np.asarray(final, dtype=bool)
+        )
+        self.weight = {} if weight is None else weight
+        self.opt = opt
+        self.name = name
+        self.alphabet = (
+            {a: j for j, a in enumerate(symbols)} if alphabet is None else alphabet
+        )
+        self.guards = guards
+
+    @classmethod
+    def from_wdfa(cls, wdfa: WDFA) -> "CompactWDFA":
+        """
+        Return the compact form of a wdfa. The states and the symbols are ordered by their repr.
+
+        :param wdfa: the wdfa
+        :return: the compact wdfa
+        """
+        states = StateSpace(sorted(wdfa.states, key=repr))
+        symbols = StateSpace(sorted(wdfa.input_symbols, key=repr))
+        delta = np.asarray(
+            [[states.index(wdfa.transitions[q][a]) for a in symbols] for q in states],
+            dtype=np.int32,
+        ).reshape(len(states), len(symbols))
+
+        end_weight = np.zeros(len(states))
+        weight = {}
+        for (i, q), (j, a) in product(enumerate(states), enumerate(symbols)):
+            w = wdfa.weight.get((q, a, wdfa.transitions[q][a]), 0)
+            if a == "end":
+                end_weight[i] = w
+            elif w:
+                weight[i, j] = w
+
+        return cls(
+            states=states,
+            symbols=symbols,
+            delta=delta,
+            initial_id=states.index(wdfa.initial_state),
+            end_weight=end_weight,
+            final=[q in wdfa.final_states for q in states],
+            weight=weight,
+            opt=wdfa.opt,
+            name=wdfa.name,
+        )
+
+    @classmethod
+    def from_guards(
+        cls,
+        states: list,
+        guards: dict,
+        initial_state,
+        end_weight: dict = None,
+        final: set = None,
+        opt: int = 1,
+        name: str = None,
+    ) -> "CompactWDFA":
+        """
+        Return the automaton whose transitions are guarded by conjunctions of literals over the propositions, e.g.,
+        guards[q] = [("a&!o", q1), ("true", q)]. The guards of a state are tried in order. The number of
+        propositions only changes the width of the bitmasks: no symbol is created per set of propositions.
+
+        :param states: the states
+        :param guards: the ordered list of pairs (guard, next state) of every state
+        :param initial_state: the initial state
+        :param end_weight: the weight of the end transition of every state, defaults to 0
+        :param final: the final states, defaults to None
+        :param opt: the number of options, defaults to 1
+        :param name: the name, defaults to None
+        :return: the compact wdfa
+        """
+        states = StateSpace(states)
+        end_weight = {} if end_weight is None else end_weight
+        final = set() if final is None else final
+        return cls(
+            states=states,
+            symbols=StateSpace([]),
+            delta=np.zeros((len(states), 0), dtype=np.int32),
+            initial_id=states.index(initial_state),
+            end_weight=np.asarray([end_weight.get(q, 0) for q in states], dtype=float),
+            final=[q in final for q in states],
+            opt=opt,
+            name=name,
+            guards={
+                states.index(q): [(guard, states.index(nq)) for guard, nq in pairs]
+                for q, pairs in guards.items()
+            },
+        )
+
+    def to_wdfa(self) -> WDFA:
+        """
+        Return the dict-based wdfa
+
+        :return: the wdfa
+        """
+        transitions = {
+            q: {a: self.states[self.delta[i, j]] for a, j in self.alphabet.items()}
+            for i, q in enumerate(self.states)
+        }
+        end = self.alphabet.get("end", -1)
+        weight = {}
+        for i, q in enumerate(self.states):
+            for a, j in self.alphabet.items():
+                w = self.end_weight[i] if j == end else self.weight.get((i, j), 0)
+                weight[q, a, transitions[q][a]] = w.item() if hasattr(w, "item") else w
+
+        wdfa = WDFA(
+            states=set(self.states),
+            input_symbols=set(self.alphabet),
+            transitions=transitions,
+            initial_state=self.initial_state,
+            final_states={q for q, f in zip(self.states, self.final.tolist()) if f},
+            weight=weight,
+            name=self.name,
+        )
+        wdfa.set_option(self.opt)
+        return wdfa
+
+    @property
+    def initial_state(self):
+        """
+        The initial state
+        """
+        return self.states[self.initial_id]
+
+    @property
+    def sink_id(self) -> int:
+        """
+        The id of the sink, or -1 if there is no sink
+        """
+        return self.states.index("sink") if "sink" in self.states else -1
+
+    def symbol_id(self, a) -> int:
+        """
+        Return the id of the symbol, or of its class
+
+        :param a: the symbol
+        :return: the id
+        """
+        try:
+            return self.alphabet[a]
+        except KeyError:
+            raise ValueError("{} is not an input symbol".format(a))
+
+    def encode_symbols(self, symbols) -> np.ndarray:
+        """
+        Return the ids of the symbols, e.g., of the labels of the states of an mdp
+
+        :param symbols: an iterable of symbols
+        :return: the array of ids
+        """
+        return np.fromiter((self.symbol_id(a) for a in symbols), dtype=np.int64)
+
+    def label_table(self, masks: np.ndarray, bits: dict) -> tuple:
+        """
+        Return the transition table over the distinct bitmasks of the labels, e.g., of the states of an mdp. Only
+        the bitmasks which occur are tabulated, so the table stays small however many propositions there are.
+
+        :param masks: the bitmasks of the labels
+        :param bits: the bit of every proposition
+        :return: the column of the label of every mask, and the table of shape (|Q|, number of distinct masks)
+        """
+        unique, labels = np.unique(np.asarray(masks, dtype=np.int64), return_inverse=True)
+        labels = labels.ravel()
+        if self.guards is None:
+            columns = {}
+            for a, j in self.alphabet.items():
+                # a symbol with a proposition without a bit never labels a state
+                columns.setdefault(label_mask(a, bits), j)
+            missing = [int(m) for m in unique if int(m) not in columns]
+            if missing:
+                raise ValueError(
+                    "the labels with bitmasks {} are not input symbols".format(missing)
+                )
+            ids = np.asarray([columns[m] for m in unique.tolist()], dtype=np.int64)
+            return labels, self.delta[:, ids].astype(np.int64)
+
+        table = np.full((len(self.states), len(unique)), -1, dtype=np.int64)
+        for i, pairs in self.guards.items():
+            for guard, j in pairs:
+                positive, negative = guard_masks(guard, bits)
+                matched = (
+                    (unique & positive == positive) & (unique & negative == 0) & (table[i] < 0)
+                )
+                table[i, matched] = j
+        if (table < 0).any():
+            i, m = np.argwhere(table < 0)[0]
+            raise ValueError(
+                "no guard of {} matches the label with bitmask {}".format(self.states[i], unique[m])
+            )
+        return labels, table
+
+    def run(self, word) -> int:
+        """
+        Return the id of the state reached from the initial state by reading a word
+
+        :param word: the iterable of input symbols
+        :return: the id of the state
+        """
+        q = self.initial_id
+        for a in word:
+            q = self.delta[q, self.symbol_id(a)]
+        return int(q)
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+
+def compress_alphabet(automata: list) -> list:
+    """
+    Merge the symbols that all the automata treat identically: two symbols are equivalent if every automaton moves
+    every state to the same state with the same weight for both. A symbol unknown to an automaton leaves its states
+    unchanged, as in sync. The "end" symbol is never merged since it carries the end weights.
+
+    :param automata: the WDFAs or CompactWDFAs
+    :return: the CompactWDFAs over the shared classes of symbols, in the same order
+    """
+    automata = [
+        automaton if isinstance(automaton, CompactWDFA) else CompactWDFA.from_wdfa(automaton)
+        for automaton in automata
+    ]
+    symbols = sorted(set().union(*(automaton.alphabet for automaton in automata)), key=repr)
+
+    # one column per symbol: the next states and the weights of every automaton, and a flag of the end symbol
+    rows = [[1 if a == "end" else 0 for a in symbols]]
+    for automaton in automata:
+        ids = np.arange(len(automaton.states))
+        rows.extend(
+            np.column_stack(
+                [
+                    automaton.delta[:, automaton.alphabet[a]] if a in automaton.alphabet else ids
+                    for a in symbols
+                ]
+            )
+        )
+        for i in {i for i, _ in automaton.weight}:
+            rows.append(
+                [
+                    automaton.weight.get((i, automaton.alphabet[a]), 0) if a in automaton.alphabet else 0
+                    for a in symbols
+                ]
+            )
+    _, first, inverse = np.unique(
+        np.asarray(rows, dtype=float), axis=1, return_index=True, return_inverse=True
+    )
+    # number the classes by their first symbols
+    order = np.argsort(np.argsort(first))
+    classes = order[inverse.ravel()]
+    representatives = [symbols[j] for j in np.sort(first)]
+    alphabet = {a: int(c) for a, c in zip(symbols, classes)}
+
+    compressed = []
+    for automaton in automata:
+        ids = np.arange(len(automaton.states))
+        delta = np.column_stack(
+            [
+                automaton.delta[:, automaton.alphabet[a]] if a in automaton.alphabet else ids
+                for a in representatives
+            ]
+        )
+        compressed.append(
+            CompactWDFA(
+                states=automaton.states,
+                symbols=StateSpace(representatives),
+                delta=delta,
+                initial_id=automaton.initial_id,
+                end_weight=automaton.end_weight,
+                final=automaton.final,
+                weight={
+                    (i, alphabet[automaton.symbols[j]]): w
+                    for (i, j), w in automaton.weight.items()
+                },
+                opt=automaton.opt,
+                name=automaton.name,
+                alphabet=alphabet,
+            )
+        )
+    return compressed
@@ -4,6 +4,7 @@ from itertools import product
 import os
 from wdfa.wdfa import WDFA
 from copy import  deepcopy
+import numpy as np
 
 def get_save_path(save_dir: str, name: str) -> str:
     """
@@ -50,14 +51,12 @@ def get_wdfa_from_dfa(dfa: DFA, path: str = None, name: str = None) -> WDFA:
     wdfa.input_symbols.add("end")
     wdfa.transitions["sink"] = {}
 
-    for q, a, nq in product(wdfa.states, wdfa.input_symbols, wdfa.states):
-        wdfa.assign_weight(q, a, nq, 0)
-
     for q, a in product(wdfa.states, wdfa.input_symbols):
         if q != "sink" and a != "end":
             wdfa.transitions[q][a] = original_transitions[q][a]
         else:
             wdfa.transitions[q][a] = "sink"
+        wdfa.assign_weight(q, a, wdfa.transitions[q][a], 0)
 
     for q in dfa.final_states:
         wdfa.assign_weight(q, "end", "sink", 1)
@@ -69,7 +68,9 @@ def get_wdfa_from_dfa(dfa: DFA, path: str = None, name: str = None) -> WDFA:
     return wdfa
 
 
-def ordered_or(wdfa1: WDFA, wdfa2: WDFA, path: str = None, name: str = None) -> WDFA:
+def ordered_or(
+    wdfa1: WDFA, wdfa2: WDFA, path: str = None, name: str = None, minimize: bool = False
+) -> WDFA:
     """
     ordered OR Operator
 
@@ -77,6 +78,7 @@ def ordered_or(wdfa1: WDFA, wdfa2: WDFA, path: str = None, name: str = None) ->
     :param wdfa2: secondary outcome given by wdfa2
     :param path: the path to save the figure, defaults to None
     :param name: name of the wdfa, defaults to None
+    :param minimize: whether to trim and minimize the product, defaults to False
     :return: use automata product to construct the weighted automaton for ordered OR.
     """
     prod_wdfa = sync_or(wdfa1, wdfa2)
@@ -109,6 +111,9 @@ def ordered_or(wdfa1: WDFA, wdfa2: WDFA, path: str = None, name: str = None) ->
 
     prod_wdfa.name = name
     prod_wdfa.set_option(wdfa1.opt + wdfa2.opt)
+    if minimize:
+        prod_wdfa.trim()
+        prod_wdfa.minimize()
     prod_wdfa.validate()
     if path:
         prod_wdfa.show_diagram(os.path.join(path, name + ".png"))
@@ -116,7 +121,7 @@ def ordered_or(wdfa1: WDFA, wdfa2: WDFA, path: str = None, name: str = None) ->
 
 
 def prioritized_conj(
-    wdfa1: WDFA, wdfa2: WDFA, path: str = None, name: str = None
+    wdfa1: WDFA, wdfa2: WDFA, path: str = None, name: str = None, minimize: bool = False
 ) -> WDFA:
     """
     prioritized conjunction: wdfa1 is preferred to wdfa2.
@@ -125,6 +130,7 @@ def prioritized_conj(
     :param wdfa2: secondary outcome given by wdfa2
     :param path: the path to save the figure, defaults to None
     :param name: name of the wdfa, defaults to None
+    :param minimize: whether to trim and minimize the product, defaults to False
     :return: use automata product to construct the weighted automaton for prioritized conjunction.
     """
     conj_wdfa = sync_conj(wdfa1, wdfa2)
@@ -153,78 +159,203 @@ def prioritized_conj(
                 conj_wdfa.weight[q, "end", "sink"] = 0
 
     conj_wdfa.name = name
+    if minimize:
+        conj_wdfa.trim()
+        conj_wdfa.minimize()
     conj_wdfa.validate()
     if path:
         conj_wdfa.show_diagram(os.path.join(path, name + ".png"))
     return conj_wdfa
 
 
+def transition_table(wdfa: WDFA, states: list, symbols: list) -> np.ndarray:
+    """
+    Return the transition table of a wdfa over the given symbols, where a symbol unknown to the wdfa leaves the state
+    unchanged
+
+    :param wdfa: the wdfa
+    :param states: the states, defining the state ids
+    :param symbols: the symbols, defining the symbol ids
+    :return: the table whose entry [q, a] is the id of the next state
+    """
+    index = {q: i for i, q in enumerate(states)}
+    return np.asarray(
+        [
+            [
+                index[wdfa.transitions[q][a]] if a in wdfa.input_symbols else index[q]
+                for a in symbols
+            ]
+            for q in states
+        ],
+        dtype=np.int64,
+    ).reshape(len(states), len(symbols))
+
+
 def sync(wdfa1: WDFA, wdfa2: WDFA) -> WDFA:
     """
     Creates a new WDFA which is the cross product of DFAs self and other
     with an empty set of final states. The state is a tuple: The difference from _cross_product
 
+    Only the pairs reachable from the pair of initial states are built, see sync_all. The input wdfas are not
+    modified.
+
     :param wdfa1: The first wdfa
     :param wdfa2: The second wdfa
     :return: A new DFA
     """
-    try:
-        assert wdfa1.input_symbols == wdfa2.input_symbols
-    except AssertionError:
-        new_input_symbols = wdfa2.input_symbols.union(wdfa1.input_symbols)
-    else:
-        new_input_symbols = wdfa2.input_symbols
-    new_input_symbols.remove("end")
-
-    for wdfa in (wdfa1, wdfa2):
-        for q, a in product(wdfa.states, new_input_symbols):
-            if a not in wdfa.input_symbols:
-                wdfa.transitions[q][a] = q
+    return sync_all([wdfa1, wdfa2])
 
-    new_states = {
-        (a, b)
-        for a, b in product(wdfa1.states, wdfa2.states)
-        if not (a == "sink" or b == "sink")
-    }
 
-    new_transitions = defaultdict(dict)
+def sync_all(wdfas: list) -> WDFA:
+    """
+    Creates a new WDFA which is the synchronous product of the wdfas with an empty set of final states. The state is
+    the flat tuple of the states of the wdfas. Only the tuples reachable from the tuple of initial states are built,
+    by a worklist over integer transition tables. A tuple with the sink of any wdfa is the sink of the product, and a
+    symbol that a wdfa does not read leaves its state unchanged. The input wdfas are not modified.
 
-    for (state_a, transitions_a), symbol, (state_b, transitions_b) in product(
-        wdfa1.transitions.items(), new_input_symbols, wdfa2.transitions.items()
-    ):
-        if (
-            symbol in transitions_a
-            and symbol in transitions_b
-            and not (
-                state_a == "sink"
-                or state_b == "sink"
-                or symbol == "end"
-                or transitions_a[symbol] == "sink"
-                or transitions_b[symbol] == "sink"
-            )
-        ):
-            new_transitions[state_a, state_b][symbol] = (
-                transitions_a[symbol],
-                transitions_b[symbol],
-            )
-    new_initial_state = (wdfa1.initial_state, wdfa2.initial_state)
+    :param wdfas: the wdfas
+    :return: A new DFA
+    """
+    symbols = sorted(set().union(*(wdfa.input_symbols for wdfa in wdfas)) - {"end"})
+    states = [sorted(wdfa.states, key=repr) for wdfa in wdfas]
+    tables = [
+        transition_table(wdfa, wdfa_states, symbols)
+        for wdfa, wdfa_states in zip(wdfas, states)
+    ]
+    sinks = np.asarray(
+        [wdfa_states.index("sink") if "sink" in wdfa_states else -1 for wdfa_states in states]
+    )
 
-    wdfa = WDFA(
-        states=new_states,
-        input_symbols=new_input_symbols,
+    initial = tuple(
+        wdfa_states.index(wdfa.initial_state) for wdfa, wdfa_states in zip(wdfas, states)
+    )
+    order = {initial: 0}
+    worklist = [initial]
+    successors = []
+    count = 0
+    while count < len(worklist):
+        ids = worklist[count]
+        count += 1
+        # the next ids of every wdfa for every symbol, one column per symbol
+        next_ids = np.stack([table[i] for table, i in zip(tables, ids)])
+        to_sink = (next_ids == sinks[:, None]).any(axis=0)
+        next_tuples = [
+            None if sink else nq for sink, nq in zip(to_sink.tolist(), map(tuple, next_ids.T.tolist()))
+        ]
+        for nq in next_tuples:
+            if nq is not None and nq not in order:
+                order[nq] = len(worklist)
+                worklist.append(nq)
+        successors.append(next_tuples)
+
+    new_states = [
+        tuple(wdfa_states[i] for wdfa_states, i in zip(states, ids)) for ids in worklist
+    ]
+    new_transitions = defaultdict(dict)
+    weight = {}
+    for q, next_tuples in zip(new_states, successors):
+        for a, ids in zip(symbols, next_tuples):
+            nq = new_states[order[ids]] if ids is not None else "sink"
+            new_transitions[q][a] = nq
+            weight[q, a, nq] = 0
+        new_transitions[q]["end"] = "sink"
+        weight[q, "end", "sink"] = 0
+    for a in symbols + ["end"]:
+        new_transitions["sink"][a] = "sink"
+        weight["sink", a, "sink"] = 0
+
+    return WDFA(
+        states=set(new_states) | {"sink"},
+        input_symbols=set(symbols) | {"end"},
         transitions=new_transitions,
-        initial_state=new_initial_state,
+        initial_state=new_states[0],
         final_states=set(),
+        weight=weight,
     )
-    wdfa.states.add("sink")
-    wdfa.input_symbols.add("end")
-    for a in wdfa.input_symbols:
-        wdfa.assign_weight("sink", a, "sink", 0)
-        wdfa.transitions["sink"][a] = "sink"
-    for q in wdfa.states:
-        wdfa.transitions[q]["end"] = "sink"
-        wdfa.assign_weight(q, "end", "sink", 0)
-    return wdfa
+
+
+def end_weights(wdfas: list, q: tuple) -> list:
+    """
+    Return the end weights of the components of a state of the product of the wdfas
+
+    :param wdfas: the wdfas
+    :param q: the state of the product
+    :return: the list of the end weights
+    """
+    return [
+        wdfa.weight.get((qi, "end", "sink"), 0) if qi != "sink" else 0
+        for wdfa, qi in zip(wdfas, q)
+    ]
+
+
+def ordered_or_all(
+    wdfas: list, path: str = None, name: str = None, minimize: bool = False
+) -> WDFA:
+    """
+    n-ary ordered OR Operator, built in one product pass. The weights are those of the chain
+    ordered_or(...ordered_or(wdfas[0], wdfas[1])..., wdfas[-1]): the first satisfied wdfa i gives its weight plus the
+    options of the wdfas preferred to it.
+
+    :param wdfas: the wdfas, from the top priority to the last
+    :param path: the path to save the figure, defaults to None
+    :param name: name of the wdfa, defaults to None
+    :param minimize: whether to minimize the product, defaults to False
+    :return: the weighted automaton for the ordered OR of the wdfas
+    """
+    prod_wdfa = sync_all(wdfas)
+    for q in prod_wdfa.states:
+        if q != "sink":
+            offset = 0
+            for w, wdfa in zip(end_weights(wdfas, q), wdfas):
+                if w > 0:
+                    prod_wdfa.assign_weight(q, "end", "sink", w + offset)
+                    break
+                offset += wdfa.opt
+
+    prod_wdfa.name = name
+    prod_wdfa.set_option(sum(wdfa.opt for wdfa in wdfas))
+    if minimize:
+        prod_wdfa.minimize()
+    prod_wdfa.validate()
+    if path:
+        prod_wdfa.show_diagram(os.path.join(path, name + ".png"))
+    return prod_wdfa
+
+
+def prioritized_conj_all(
+    wdfas: list, path: str = None, name: str = None, minimize: bool = False
+) -> WDFA:
+    """
+    n-ary prioritized conjunction, built in one product pass. The weights are those of the chain
+    prioritized_conj(...prioritized_conj(wdfas[0], wdfas[1])..., wdfas[-1]): a state is weighted only if all the
+    wdfas are satisfied, lexicographically by their weights.
+
+    :param wdfas: the wdfas, from the top priority to the last
+    :param path: the path to save the figure, defaults to None
+    :param name: name of the wdfa, defaults to None
+    :param minimize: whether to minimize the product, defaults to False
+    :return: the weighted automaton for the prioritized conjunction of the wdfas
+    """
+    conj_wdfa = sync_all(wdfas)
+    for q in conj_wdfa.states:
+        if q != "sink":
+            weights = end_weights(wdfas, q)
+            weight = weights[0]
+            for w, wdfa in zip(weights[1:], wdfas[1:]):
+                weight = wdfa.opt * (weight - 1) + w if weight > 0 and w > 0 else 0
+            conj_wdfa.assign_weight(q, "end", "sink", weight)
+
+    conj_wdfa.name = name
+    opt = 1
+    for wdfa in wdfas:
+        opt *= wdfa.opt
+    conj_wdfa.set_option(opt)
+    if minimize:
+        conj_wdfa.minimize()
+    conj_wdfa.validate()
+    if path:
+        conj_wdfa.show_diagram(os.path.join(path, name + ".png"))
+    return conj_wdfa
 
 
 def sync_conj(wdfa1: WDFA, wdfa2: WDFA) -> WDFA:
@@ -3,6 +3,7 @@ from pydot import Dot, Edge, Node
 from itertools import product
 from collections import defaultdict
 from tabulate import tabulate
+import numpy as np
 
 
 class WDFA(DFA):
@@ -15,7 +16,7 @@ class WDFA(DFA):
      4. an initial state,
      5. a set final states
      6. weight function, implemented as a dictionary: weight[q, a, nq] defines the weight going from state q to state nq
-        with input a.
+        with input a, for the transitions nq = transitions[q][a] only.
     """
 
     def __init__(
@@ -29,8 +30,11 @@ class WDFA(DFA):
         name=None,
     ) -> None:
         if weight is None:
+            # only the transitions have weights
             self.weight = {
-                (q, a, nq): 0 for q, a, nq in product(states, input_symbols, states)
+                (q, a, nq): 0
+                for q, lookup in transitions.items()
+                for a, nq in lookup.items()
             }
         else:
             self.weight = weight
@@ -91,11 +95,12 @@ class WDFA(DFA):
         Remove unreachable states
         """
         states = [self.initial_state]
+        visited = {self.initial_state}
         weight = defaultdict()
         transitions = defaultdict(dict)
         count = 0
 
-        # iteratively trim the automaton
+        # iteratively trim the automaton, a breadth-first search with the visited states in a set
         while count < len(states):
             from_state = states[count]
             count += 1
@@ -107,14 +112,79 @@ class WDFA(DFA):
                     from_state, a, next_state
                 ]
 
-                if next_state in states:
-                    pass
-                else:
+                if next_state not in visited:
+                    visited.add(next_state)
                     states.append(next_state)
 
         self.transitions = transitions
         self.weight = weight
-        self.states = set(states)
+        self.states = visited
+        self.final_states = self.final_states & visited
+
+    def minimize(self) -> None:
+        """
+        Merge the states with the same future behaviour by Moore's partition refinement: two states are equivalent if
+        they agree on being final, on the weights of their outgoing transitions, e.g., the end weights, and their
+        successors are equivalent for every input symbol. The sink is never merged since the compositions treat it
+        specially. A block is represented by the initial state if it contains it, otherwise by its first state in the
+        order of repr.
+        """
+        states = sorted(self.states, key=repr)
+        symbols = sorted(self.input_symbols, key=repr)
+        index = {q: i for i, q in enumerate(states)}
+        delta = np.asarray(
+            [[index[self.transitions[q][a]] for a in symbols] for q in states],
+            dtype=np.int64,
+        ).reshape(len(states), len(symbols))
+
+        # the initial partition by the local behaviour of every state
+        signatures = {}
+        block = np.asarray(
+            [
+                signatures.setdefault(
+                    (
+                        q == "sink",
+                        q in self.final_states,
+                        tuple(
+                            self.weight.get((q, a, self.transitions[q][a]), 0)
+                            for a in symbols
+                        ),
+                    ),
+                    len(signatures),
+                )
+                for q in states
+            ],
+            dtype=np.int64,
+        )
+        num_blocks = len(signatures)
+        while True:
+            _, new_block = np.unique(
+                np.column_stack([block, block[delta]]), axis=0, return_inverse=True
+            )
+            new_block = new_block.ravel()
+            if new_block.max(initial=-1) + 1 == num_blocks:
+                break
+            block, num_blocks = new_block, new_block.max() + 1
+        if num_blocks == len(states):
+            return
+
+        representatives = {}
+        for q in [self.initial_state] + states:
+            representatives.setdefault(block[index[q]], q)
+        rep = {q: representatives[block[i]] for i, q in enumerate(states)}
+
+        transitions = defaultdict(dict)
+        weight = defaultdict()
+        for q in set(rep.values()):
+            for a in symbols:
+                nq = self.transitions[q][a]
+                transitions[q][a] = rep[nq]
+                weight[q, a, rep[nq]] = self.weight.get((q, a, nq), 0)
+
+        self.transitions = transitions
+        self.weight = weight
+        self.states = set(rep.values())
+        self.final_states = {rep[q] for q in self.final_states}
 
     def show_diagram(self, path=None):
         """